@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Shared adb helpers for the visual testing scripts.
+
+Device discovery forks adb — and implicitly boots the adb server when
+it isn't running yet (~500ms) — so both run_visual_tests.py and
+test_feedback_loop.py go through the single cached helper here instead
+of each spawning their own `adb devices`.
+"""
+
+import shutil
+import subprocess
+import time
+from functools import lru_cache
+from typing import List, Optional
+
+
+# Per-process TTL cache: repeated checks within a few seconds reuse the
+# last discovery instead of forking adb again, while devices that come
+# and go mid-session are still noticed.
+_devices: Optional[List[str]] = None
+_devices_expiry: float = 0.0
+
+DEVICE_CACHE_TTL = 5.0
+
+
+@lru_cache(maxsize=1)
+def adb_path() -> str:
+    """Absolute path to the adb binary, resolved once per process.
+
+    Spawning with a bare "adb" makes execvp walk $PATH (one stat per
+    directory) on every subprocess; resolving here means each spawn
+    gets a direct execv. Falls back to "adb" when not on PATH so the
+    caller still gets adb's own error message.
+    """
+    return shutil.which("adb") or "adb"
+
+
+def get_devices(refresh: bool = False) -> List[str]:
+    """Return the serials of all connected devices in 'device' state.
+
+    `adb start-server` is issued first so the server-boot cost is paid
+    up front (it is a no-op when the server is already running) rather
+    than being hidden inside the first `adb devices` call. The result
+    is cached for DEVICE_CACHE_TTL seconds.
+    """
+    global _devices, _devices_expiry
+    if (_devices is not None and not refresh
+            and time.monotonic() < _devices_expiry):
+        return _devices
+
+    try:
+        adb = adb_path()
+        subprocess.run(
+            [adb, "start-server"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False
+        )
+        result = subprocess.run(
+            [adb, "devices"],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        print(f"❌ Error checking devices: {e}")
+        return []
+
+    serials = []
+    for line in result.stdout.strip().split('\n')[1:]:
+        # `adb devices` output is "<serial>\t<state>"; one targeted
+        # split beats generic whitespace tokenizing on every line.
+        parts = line.split('\t', 1)
+        if len(parts) == 2 and parts[1].strip() == "device":
+            serials.append(parts[0])
+
+    _devices = serials
+    _devices_expiry = time.monotonic() + DEVICE_CACHE_TTL
+    return serials
@@ -10,14 +10,16 @@ Usage:
 """
 
 import argparse
+import filecmp
 import json
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Tuple
 
 try:
-    from PIL import Image, ImageChops, ImageDraw, ImageFont
+    from PIL import Image
     import numpy as np
     HAS_PIL = True
 except ImportError:
@@ -25,219 +27,54 @@ except ImportError:
     print("WARNING: PIL (Pillow) not installed. Install with: pip install Pillow")
     print("Falling back to basic file comparison mode.")
 
+try:
+    from skimage.metrics import structural_similarity as ssim
+    HAS_SKIMAGE = True
+except ImportError:
+    HAS_SKIMAGE = False
 
-class ScreenshotComparator:
-    """Compare screenshots from visual regression tests."""
-
-    def __init__(self, baseline_dir: str, current_dir: str, output_dir: str):
-        self.baseline_dir = Path(baseline_dir)
-        self.current_dir = Path(current_dir)
-        self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-
-        self.diff_dir = self.output_dir / "diffs"
-        self.diff_dir.mkdir(exist_ok=True)
-
-        self.results: List[Dict] = []
-
-    def compare_all(self) -> Dict:
-        """Compare all screenshots in baseline and current directories."""
-        print("=== Screenshot Comparison ===\n")
-
-        baseline_files = set(f.name for f in self.baseline_dir.glob("*.png"))
-        current_files = set(f.name for f in self.current_dir.glob("*.png"))
-
-        missing_in_current = baseline_files - current_files
-        new_in_current = current_files - baseline_files
-        common_files = baseline_files & current_files
-
-        print(f"Baseline screenshots: {len(baseline_files)}")
-        print(f"Current screenshots: {len(current_files)}")
-        print(f"Common screenshots: {len(common_files)}")
-        print(f"Missing in current: {len(missing_in_current)}")
-        print(f"New in current: {len(new_in_current)}\n")
-
-        # Report missing and new files
-        if missing_in_current:
-            print("⚠️  Missing screenshots:")
-            for filename in sorted(missing_in_current):
-                print(f"  - {filename}")
-                self.results.append({
-                    "test": filename.replace('.png', ''),
-                    "status": "missing",
-                    "message": "Screenshot missing in current run"
-                })
-            print()
-
-        if new_in_current:
-            print("✨ New screenshots:")
-            for filename in sorted(new_in_current):
-                print(f"  + {filename}")
-                self.results.append({
-                    "test": filename.replace('.png', ''),
-                    "status": "new",
-                    "message": "New screenshot in current run"
-                })
-            print()
-
-        # Compare common files
-        if common_files:
-            print("📊 Comparing screenshots...\n")
-            for filename in sorted(common_files):
-                self.compare_screenshot(filename)
-
-        return self.generate_summary()
-
-    def compare_screenshot(self, filename: str) -> None:
-        """Compare a single screenshot."""
-        baseline_path = self.baseline_dir / filename
-        current_path = self.current_dir / filename
-        test_id = filename.replace('.png', '')
-
-        print(f"Comparing: {test_id}")
-
-        if not HAS_PIL:
-            # Fallback: simple byte comparison
-            with open(baseline_path, 'rb') as f1, open(current_path, 'rb') as f2:
-                baseline_bytes = f1.read()
-                current_bytes = f2.read()
-
-            if baseline_bytes == current_bytes:
-                print(f"  ✓ Identical")
-                self.results.append({
-                    "test": test_id,
-                    "status": "identical",
-                    "message": "Screenshots are byte-for-byte identical"
-                })
-            else:
-                print(f"  ✗ Different (byte comparison)")
-                self.results.append({
-                    "test": test_id,
-                    "status": "different",
-                    "message": "Screenshots differ"
-                })
-            return
-
-        # Use PIL for image comparison
-        try:
-            baseline_img = Image.open(baseline_path)
-            current_img = Image.open(current_path)
-
-            # Check if dimensions match
-            if baseline_img.size != current_img.size:
-                print(f"  ✗ Different dimensions: {baseline_img.size} vs {current_img.size}")
-                self.results.append({
-                    "test": test_id,
-                    "status": "different",
-                    "message": f"Different dimensions: {baseline_img.size} vs {current_img.size}"
-                })
-                return
-
-            # Calculate difference
-            diff_img = ImageChops.difference(baseline_img, current_img)
-
-            # Convert to numpy for analysis
-            diff_array = np.array(diff_img)
-            non_zero_pixels = np.count_nonzero(diff_array)
-            total_pixels = diff_array.size
-
-            if non_zero_pixels == 0:
-                print(f"  ✓ Identical")
-                self.results.append({
-                    "test": test_id,
-                    "status": "identical",
-                    "message": "Screenshots are identical"
-                })
-            else:
-                diff_percentage = (non_zero_pixels / total_pixels) * 100
-                print(f"  ✗ Different: {diff_percentage:.2f}% of pixels differ")
-
-                # Save diff image
-                diff_output_path = self.diff_dir / f"{test_id}_diff.png"
-                self.create_diff_visualization(baseline_img, current_img, diff_img, diff_output_path)
-
-                self.results.append({
-                    "test": test_id,
-                    "status": "different",
-                    "message": f"{diff_percentage:.2f}% of pixels differ",
-                    "diff_percentage": diff_percentage,
-                    "diff_image": str(diff_output_path.relative_to(self.output_dir))
-                })
-
-        except Exception as e:
-            print(f"  ✗ Error comparing: {e}")
-            self.results.append({
-                "test": test_id,
-                "status": "error",
-                "message": f"Error comparing: {str(e)}"
-            })
-
-    def create_diff_visualization(self, baseline: Image.Image, current: Image.Image,
-                                   diff: Image.Image, output_path: Path) -> None:
-        """Create a side-by-side visualization with diff highlighting."""
-        # Create a composite image: baseline | current | diff
-        width, height = baseline.size
-        composite = Image.new('RGB', (width * 3, height))
-
-        # Paste baseline
-        composite.paste(baseline.convert('RGB'), (0, 0))
-
-        # Paste current
-        composite.paste(current.convert('RGB'), (width, 0))
-
-        # Create highlighted diff (amplify differences)
-        diff_enhanced = diff.point(lambda p: p * 10 if p < 255 else 255)
-        composite.paste(diff_enhanced.convert('RGB'), (width * 2, 0))
-
-        # Add labels
-        draw = ImageDraw.Draw(composite)
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 20)
-        except:
-            font = None
-
-        draw.text((10, 10), "Baseline", fill='red', font=font)
-        draw.text((width + 10, 10), "Current", fill='red', font=font)
-        draw.text((width * 2 + 10, 10), "Difference (10x)", fill='red', font=font)
-
-        composite.save(output_path)
-
-    def generate_summary(self) -> Dict:
-        """Generate a summary of comparison results."""
-        summary = {
-            "total_tests": len(self.results),
-            "identical": sum(1 for r in self.results if r['status'] == 'identical'),
-            "different": sum(1 for r in self.results if r['status'] == 'different'),
-            "missing": sum(1 for r in self.results if r['status'] == 'missing'),
-            "new": sum(1 for r in self.results if r['status'] == 'new'),
-            "errors": sum(1 for r in self.results if r['status'] == 'error'),
-            "results": self.results
-        }
-
-        # Save JSON report
-        report_path = self.output_dir / "comparison_report.json"
-        with open(report_path, 'w') as f:
-            json.dump(summary, f, indent=2)
-
-        print(f"\n=== Summary ===")
-        print(f"Total tests: {summary['total_tests']}")
-        print(f"  ✓ Identical: {summary['identical']}")
-        print(f"  ✗ Different: {summary['different']}")
-        print(f"  ⚠️  Missing: {summary['missing']}")
-        print(f"  ✨ New: {summary['new']}")
-        print(f"  ❌ Errors: {summary['errors']}")
-        print(f"\nReport saved to: {report_path}")
-
-        # Generate HTML report
-        self.generate_html_report(summary)
-
-        return summary
-
-    def generate_html_report(self, summary: Dict) -> None:
-        """Generate an HTML report for easy visualization."""
-        html_path = self.output_dir / "comparison_report.html"
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
-        html_content = """<!DOCTYPE html>
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _diff_count_fused(a, b, mask):  # pragma: no cover - compiled
+        """Fused compare + mask + count: one read of a and b, one write.
+
+        XOR instead of subtraction so the compiler vectorizes the
+        per-channel combine without worrying about overflow.
+        """
+        n = 0
+        for i in prange(a.shape[0]):
+            for j in range(a.shape[1]):
+                d = (a[i, j, 0] ^ b[i, j, 0]) | \
+                    (a[i, j, 1] ^ b[i, j, 1]) | \
+                    (a[i, j, 2] ^ b[i, j, 2])
+                mask[i, j] = d != 0
+                if d:
+                    n += 1
+        return n
+
+# Pixel-exact diffs are brittle against anti-aliasing and font-hinting
+# jitter. When scikit-image is available, pairs whose structural
+# similarity is above this threshold are treated as identical even if
+# a few pixel values moved.
+SSIM_IDENTICAL_THRESHOLD = 0.999
+
+
+# HTML report fragments. The head is written verbatim (its CSS braces
+# are literal), the summary and per-card templates are formatted once
+# per write.
+_HTML_HEAD = """<!DOCTYPE html>
 <html>
 <head>
     <title>Ghostty Screenshot Comparison Report</title>
@@ -321,7 +158,9 @@ class ScreenshotComparator:
 <body>
     <h1>Ghostty Screenshot Comparison Report</h1>
 
-    <div class="summary">
+"""
+
+_HTML_SUMMARY = """    <div class="summary">
         <h2>Summary</h2>
         <div class="summary-grid">
             <div class="summary-item identical">
@@ -343,43 +182,419 @@ class ScreenshotComparator:
         </div>
     </div>
 
-    <h2>Details</h2>
-    <div class="test-grid">
 """
 
-        for result in sorted(summary['results'], key=lambda x: (x['status'], x['test'])):
-            status_class = result['status']
-            test_id = result['test']
-
-            html_content += f"""
+_HTML_CARD = """\
         <div class="test-card">
-            <h3>{test_id}</h3>
-            <div class="status {status_class}">{status_class.upper()}</div>
-            <div>{result['message']}</div>
+            <h3>{test}</h3>
+            <div class="status {status}">{status_upper}</div>
+            <div>{message}</div>
+{img}        </div>
 """
 
-            if result.get('diff_image'):
-                html_content += f"""
-            <img src="{result['diff_image']}" alt="{test_id} diff">
-"""
 
-            html_content += """
-        </div>
-"""
+class ScreenshotComparator:
+    """Compare screenshots from visual regression tests."""
 
-        html_content += """
-    </div>
-</body>
-</html>
-"""
+    def __init__(self, baseline_dir: str, current_dir: str, output_dir: str):
+        self.baseline_dir = Path(baseline_dir)
+        self.current_dir = Path(current_dir)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self.diff_dir = self.output_dir / "diffs"
+        self.diff_dir.mkdir(exist_ok=True)
+
+        self.results: List[Dict] = []
 
-        with open(html_path, 'w') as f:
-            f.write(html_content.format(**summary))
+    def compare_all(self) -> Dict:
+        """Compare all screenshots in baseline and current directories."""
+        print("=== Screenshot Comparison ===\n")
+
+        # One iterdir() pass per directory with a suffix check beats
+        # glob("*.png") (fnmatch compile + per-entry matching) on large
+        # directories, and the name -> Path maps let the compare jobs
+        # reuse these Path objects instead of rebuilding them.
+        baseline_entries = {
+            p.name: p for p in self.baseline_dir.iterdir() if p.suffix == '.png'
+        }
+        current_entries = {
+            p.name: p for p in self.current_dir.iterdir() if p.suffix == '.png'
+        }
+        baseline_files = set(baseline_entries)
+        current_files = set(current_entries)
+
+        missing_in_current = baseline_files - current_files
+        new_in_current = current_files - baseline_files
+        common_files = baseline_files & current_files
+
+        print(f"Baseline screenshots: {len(baseline_files)}")
+        print(f"Current screenshots: {len(current_files)}")
+        print(f"Common screenshots: {len(common_files)}")
+        print(f"Missing in current: {len(missing_in_current)}")
+        print(f"New in current: {len(new_in_current)}\n")
+
+        # Report missing and new files
+        if missing_in_current:
+            print("⚠️  Missing screenshots:")
+            for filename in sorted(missing_in_current):
+                print(f"  - {filename}")
+                self.results.append({
+                    "test": filename.replace('.png', ''),
+                    "status": "missing",
+                    "message": "Screenshot missing in current run"
+                })
+            print()
+
+        if new_in_current:
+            print("✨ New screenshots:")
+            for filename in sorted(new_in_current):
+                print(f"  + {filename}")
+                self.results.append({
+                    "test": filename.replace('.png', ''),
+                    "status": "new",
+                    "message": "New screenshot in current run"
+                })
+            print()
+
+        # Compare common files. Each comparison only touches its own two
+        # files (PNG decode + numpy diff), so the work is dispatched
+        # across a process pool and results are collected as they finish.
+        if common_files:
+            print("📊 Comparing screenshots...\n")
+            jobs = [
+                (baseline_entries[f], current_entries[f],
+                 self.diff_dir, self.output_dir)
+                for f in sorted(common_files)
+            ]
+
+            if len(jobs) == 1:
+                compared = [compare_screenshot(*jobs[0])]
+            else:
+                with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                    futures = [executor.submit(compare_screenshot, *job) for job in jobs]
+                    compared = [future.result() for future in as_completed(futures)]
+
+            for result in sorted(compared, key=lambda r: r['test']):
+                marker = "✓" if result['status'] == 'identical' else "✗"
+                print(f"Comparing: {result['test']}")
+                print(f"  {marker} {result['message']}")
+                self.results.append(result)
+
+        return self.generate_summary()
+
+    def generate_summary(self) -> Dict:
+        """Generate a summary of comparison results."""
+        summary = {
+            "total_tests": len(self.results),
+            "identical": sum(1 for r in self.results if r['status'] == 'identical'),
+            "different": sum(1 for r in self.results if r['status'] == 'different'),
+            "missing": sum(1 for r in self.results if r['status'] == 'missing'),
+            "new": sum(1 for r in self.results if r['status'] == 'new'),
+            "errors": sum(1 for r in self.results if r['status'] == 'error'),
+            "results": self.results
+        }
+
+        # Save JSON report. orjson serializes in C at several times
+        # stdlib throughput (and handles any stray numpy scalars), which
+        # matters once large suites push the report into megabytes.
+        report_path = self.output_dir / "comparison_report.json"
+        if HAS_ORJSON:
+            report_path.write_bytes(orjson.dumps(
+                summary,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(report_path, 'w') as f:
+                json.dump(summary, f, indent=2)
+
+        print(f"\n=== Summary ===")
+        print(f"Total tests: {summary['total_tests']}")
+        print(f"  ✓ Identical: {summary['identical']}")
+        print(f"  ✗ Different: {summary['different']}")
+        print(f"  ⚠️  Missing: {summary['missing']}")
+        print(f"  ✨ New: {summary['new']}")
+        print(f"  ❌ Errors: {summary['errors']}")
+        print(f"\nReport saved to: {report_path}")
+
+        # Generate HTML report
+        self.generate_html_report(summary)
+
+        return summary
+
+    def generate_html_report(self, summary: Dict) -> None:
+        """Generate an HTML report for easy visualization."""
+        html_path = self.output_dir / "comparison_report.html"
+
+        # Stream the report: static head, one write per card, then the
+        # footer. This avoids accumulating one giant string (quadratic
+        # concatenation) and never runs str.format over the CSS block,
+        # whose literal braces are not format placeholders.
+        with open(html_path, 'w', buffering=1 << 16) as f:
+            f.write(_HTML_HEAD)
+            f.write(_HTML_SUMMARY.format(
+                identical=summary['identical'],
+                different=summary['different'],
+                missing=summary['missing'],
+                new=summary['new'],
+            ))
+            f.write('    <h2>Details</h2>\n    <div class="test-grid">\n')
+
+            for result in sorted(summary['results'], key=lambda x: (x['status'], x['test'])):
+                if result.get('diff_image'):
+                    # Baseline and current are referenced in place; only
+                    # the diff mask is an artifact of this report.
+                    img = (
+                        f'''            <img src="file://{result['baseline_image']}" alt="{result['test']} baseline">\n'''
+                        f'''            <img src="file://{result['current_image']}" alt="{result['test']} current">\n'''
+                        f'''            <img src="{result['diff_image']}" alt="{result['test']} diff">\n'''
+                    )
+                else:
+                    img = ''
+                f.write(_HTML_CARD.format(
+                    test=result['test'],
+                    status=result['status'],
+                    status_upper=result['status'].upper(),
+                    message=result['message'],
+                    img=img,
+                ))
+
+            f.write('    </div>\n</body>\n</html>\n')
 
         print(f"HTML report saved to: {html_path}")
         print(f"\nView report: file://{html_path.absolute()}")
 
 
+
+
+# Per-process scratch buffers for the compare temporaries, keyed by
+# image shape. Screenshots in a suite share one resolution, so each
+# pool worker allocates these once and reuses the (warm) pages on every
+# subsequent compare instead of paying fresh-mmap page-fault cost.
+# Pillow's own decode buffers can't be reused from Python, so the reuse
+# covers the elementwise-compare and reduction outputs.
+_scratch_buffers: Dict[tuple, tuple] = {}
+
+
+def _diff_mask(baseline_array: 'np.ndarray', current_array: 'np.ndarray') -> tuple:
+    """Per-pixel difference mask and count, into reused scratch buffers.
+
+    With numba available a single fused kernel reads each pixel once and
+    produces both outputs; otherwise two numpy ufunc passes do the same.
+    """
+    key = baseline_array.shape
+    buffers = _scratch_buffers.get(key)
+    if buffers is None:
+        buffers = (
+            np.empty(key, dtype=bool),
+            np.empty(key[:2], dtype=bool),
+        )
+        _scratch_buffers[key] = buffers
+
+    channel_neq, mask = buffers
+    if HAS_NUMBA:
+        count = int(_diff_count_fused(
+            np.ascontiguousarray(baseline_array),
+            np.ascontiguousarray(current_array),
+            mask))
+        return mask, count
+
+    np.not_equal(baseline_array, current_array, out=channel_neq)
+    np.any(channel_neq, axis=-1, out=mask)
+    return mask, int(mask.sum())
+
+
+def _ensure_rgb(img: 'Image.Image') -> 'Image.Image':
+    """Return img in RGB mode, skipping the copy when it already is.
+
+    convert('RGB') allocates and copies even for an RGB source;
+    screencap output is RGBA so the conversion is usually real, but
+    pre-converted inputs shouldn't pay for a full-image copy.
+    """
+    return img if img.mode == 'RGB' else img.convert('RGB')
+
+
+def _load_baseline_pixels(baseline_path: Path) -> 'np.ndarray':
+    """Return baseline RGB pixels via an mmapped ``.npy`` sidecar cache.
+
+    Baselines never change between runs, so their PNG decode is pure
+    repeated zlib-inflate work. The first compare of a baseline decodes
+    it once and serializes the raw pixels to
+    ``<baseline_dir>/.pixel_cache/<stem>.<mtime_ns>.npy``; subsequent
+    runs memory-map that file and skip the decode entirely. Keying on
+    mtime_ns invalidates the cache when a baseline is re-recorded, and
+    stale entries for the same stem are evicted lazily on refresh.
+    """
+    cache_dir = baseline_path.parent / ".pixel_cache"
+    mtime_ns = baseline_path.stat().st_mtime_ns
+    cache_path = cache_dir / f"{baseline_path.stem}.{mtime_ns}.npy"
+    if cache_path.exists():
+        return np.load(cache_path, mmap_mode='r')
+
+    array = np.asarray(_ensure_rgb(Image.open(baseline_path)))
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        for stale in cache_dir.glob(f"{baseline_path.stem}.*.npy"):
+            stale.unlink(missing_ok=True)
+        np.save(cache_path, array)
+    except OSError:
+        # Cache is best-effort: a read-only baseline dir (or a race with
+        # another worker) degrades to plain decode, never to a failure.
+        pass
+    return array
+
+
+def compare_screenshot(baseline_path: Path, current_path: Path,
+                       diff_dir: Path, output_dir: Path) -> Dict:
+    """Compare a single screenshot pair and return a result dict.
+
+    Pure function (no shared state) so it can run in a worker process.
+    """
+    test_id = baseline_path.name.replace('.png', '')
+
+    # Fast path: byte-identical files need no PNG decode at all.
+    # filecmp short-circuits on size mismatch and uses buffered reads,
+    # so the common "unchanged screenshot" case stays sub-millisecond.
+    if filecmp.cmp(baseline_path, current_path, shallow=False):
+        return {
+            "test": test_id,
+            "status": "identical",
+            "message": "Screenshots are byte-for-byte identical"
+        }
+
+    if not HAS_PIL:
+        # Fallback: without PIL we can't analyze further than "differs"
+        return {
+            "test": test_id,
+            "status": "different",
+            "message": "Screenshots differ"
+        }
+
+    # Use PIL for image comparison
+    try:
+        baseline_array = _load_baseline_pixels(baseline_path)
+        current_img = _ensure_rgb(Image.open(current_path))
+        current_array = np.asarray(current_img)
+
+        # Check if dimensions match
+        if baseline_array.shape != current_array.shape:
+            baseline_size = (baseline_array.shape[1], baseline_array.shape[0])
+            return {
+                "test": test_id,
+                "status": "different",
+                "message": f"Different dimensions: {baseline_size} vs {current_img.size}"
+            }
+
+        # The cached baseline is raw pixels, so PIL operations on it go
+        # through fromarray (no PNG decode involved).
+        baseline_img = Image.fromarray(np.ascontiguousarray(baseline_array))
+
+        # Cheap 64x64 thumbnail pre-check (difPy-style): pairs that are
+        # obviously different at thumbnail scale skip the SSIM
+        # arbitration below — no need to ask whether a gross mismatch
+        # is anti-aliasing jitter. Thumbnail equality is NOT proof of
+        # identity at full resolution, so that side still falls through
+        # to the exact compare.
+        baseline_small = np.asarray(
+            baseline_img.resize((64, 64), Image.BILINEAR), dtype=np.int16)
+        current_small = np.asarray(
+            current_img.resize((64, 64), Image.BILINEAR), dtype=np.int16)
+        thumb_delta = np.abs(baseline_small - current_small)
+
+        if thumb_delta.max() > 32:
+            # Clearly different. The full-resolution mask is computed
+            # anyway for the diff artifact, so report its exact count
+            # rather than a thumbnail estimate.
+            diff_mask, non_zero_pixels = _diff_mask(
+                baseline_array, current_array)
+            diff_percentage = (non_zero_pixels / diff_mask.size) * 100
+            diff_output_path = diff_dir / f"{test_id}_diff.webp"
+            save_diff_mask(diff_mask, diff_output_path)
+            return {
+                "test": test_id,
+                "status": "different",
+                "message": f"{diff_percentage:.2f}% of pixels differ",
+                "diff_percentage": diff_percentage,
+                "diff_image": str(diff_output_path.relative_to(output_dir)),
+                "baseline_image": str(baseline_path.absolute()),
+                "current_image": str(current_path.absolute())
+            }
+
+        # Calculate difference: a single vectorized pass over both
+        # arrays, counting differing *pixels* (any channel) rather
+        # than differing channels.
+        diff_mask, non_zero_pixels = _diff_mask(baseline_array, current_array)
+        total_pixels = diff_mask.size
+
+        if non_zero_pixels == 0:
+            return {
+                "test": test_id,
+                "status": "identical",
+                "message": "Screenshots are identical"
+            }
+
+        diff_percentage = (non_zero_pixels / total_pixels) * 100
+
+        # Pixel values moved, but the change may be anti-aliasing or
+        # font-hinting jitter. Score structural similarity on grayscale
+        # and treat near-1.0 scores as identical; the DSSIM (1 - score)
+        # is recorded either way for trend tracking.
+        ssim_score = None
+        if HAS_SKIMAGE:
+            gray_baseline = np.asarray(baseline_img.convert('L'))
+            gray_current = np.asarray(current_img.convert('L'))
+            ssim_score = float(ssim(gray_baseline, gray_current, data_range=255))
+
+            if ssim_score >= SSIM_IDENTICAL_THRESHOLD:
+                return {
+                    "test": test_id,
+                    "status": "identical",
+                    "message": (f"{diff_percentage:.2f}% of pixels differ but "
+                                f"SSIM {ssim_score:.4f} is above threshold"),
+                    "ssim": ssim_score,
+                    "dssim": 1.0 - ssim_score
+                }
+
+        # Save diff mask
+        diff_output_path = diff_dir / f"{test_id}_diff.webp"
+        save_diff_mask(diff_mask, diff_output_path)
+
+        result = {
+            "test": test_id,
+            "status": "different",
+            "message": f"{diff_percentage:.2f}% of pixels differ",
+            "diff_percentage": diff_percentage,
+            "diff_image": str(diff_output_path.relative_to(output_dir)),
+            "baseline_image": str(baseline_path.absolute()),
+            "current_image": str(current_path.absolute())
+        }
+        if ssim_score is not None:
+            result["ssim"] = ssim_score
+            result["dssim"] = 1.0 - ssim_score
+        return result
+
+    except Exception as e:
+        return {
+            "test": test_id,
+            "status": "error",
+            "message": f"Error comparing: {str(e)}"
+        }
+
+
+def save_diff_mask(diff_mask: 'np.ndarray', output_path: Path) -> None:
+    """Save a boolean per-pixel diff mask as a lossless WebP.
+
+    Diffs are ephemeral CI artifacts. Lossless WebP at the fastest
+    method encodes about as quickly as zlib level 1 PNG but produces
+    roughly half the bytes for these mostly-flat masks, which cuts CI
+    artifact upload time. The HTML report shows baseline and current
+    next to the mask, which makes the old 3x-wide composite (and its
+    3x encode cost) redundant.
+    """
+    mask = diff_mask.astype(np.uint8) * 255
+    Image.fromarray(mask, mode='L').save(
+        output_path, format='WEBP', lossless=True, method=0)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Compare screenshots from visual regression tests"
@@ -0,0 +1,619 @@
+#!/usr/bin/env python3
+"""
+Visual Test Orchestrator for Ghostty Android
+
+Drives the in-app TestRunner over ADB: launches each test, watches the
+TestRunner logcat markers (TEST_START / TEST_READY / TEST_COMPLETE) on a
+single long-lived logcat stream, and captures a screenshot once the test
+reports ready. One logcat subprocess serves the whole run — there is no
+per-test or per-poll adb spawn in the monitoring path.
+
+Usage:
+    python run_visual_tests.py --output /tmp/ghostty_tests
+    python run_visual_tests.py --output /tmp/ghostty_tests --test basic_colors_fg
+    python run_visual_tests.py --output /tmp/ghostty_tests --tag color
+"""
+
+import argparse
+import json
+import os
+import re
+import selectors
+import shlex
+import shutil
+import struct
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from operator import itemgetter
+from pathlib import Path
+from string import Template
+from typing import Dict, Iterator, List, Tuple
+
+from adb_utils import adb_path, get_devices
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+
+# All available tests in execution order (mirrors TestSuite.kt).
+# A tuple so it can't drift at runtime; _TEST_INDEX gives O(1)
+# membership/position lookups for CLI validation.
+ALL_TESTS = (
+    "basic_colors_fg",
+    "basic_colors_bg",
+    "256_colors",
+    "rgb_colors",
+    "text_attributes",
+    "combined_attributes",
+    "cursor_position",
+    "cursor_movement",
+    "cursor_visibility",
+    "cursor_styles",
+    "screen_clear",
+    "line_operations",
+    "line_wrap_basic",
+    "line_wrap_word_boundary",
+    "line_wrap_ansi_colors",
+    "scrollback",
+    "utf8_basic",
+    "emoji",
+    "box_drawing",
+    "special_chars",
+    "double_width",
+    "combining_chars",
+    "prompt_symbols"
+)
+
+_TEST_INDEX = {t: i for i, t in enumerate(ALL_TESTS)}
+
+# Tags per test (mirrors the tags(...) declarations in TestSuite.kt)
+TEST_TAGS = {
+    "basic_colors_fg": ("color", "ansi", "basic"),
+    "basic_colors_bg": ("color", "ansi", "basic"),
+    "256_colors": ("color", "256color"),
+    "rgb_colors": ("color", "truecolor", "rgb"),
+    "text_attributes": ("attributes", "style"),
+    "combined_attributes": ("attributes", "style", "combined"),
+    "cursor_position": ("cursor", "movement"),
+    "cursor_movement": ("cursor", "movement"),
+    "cursor_visibility": ("cursor", "visibility", "dectcem"),
+    "cursor_styles": ("cursor", "style", "decscusr"),
+    "screen_clear": ("screen", "clear"),
+    "line_operations": ("screen", "line"),
+    "line_wrap_basic": ("wrap", "reflow"),
+    "line_wrap_word_boundary": ("wrap", "word"),
+    "line_wrap_ansi_colors": ("wrap", "color"),
+    "scrollback": ("wrap", "scroll"),
+    "utf8_basic": ("charset", "utf8"),
+    "emoji": ("charset", "emoji", "utf8"),
+    "box_drawing": ("charset", "box", "unicode"),
+    "special_chars": ("charset", "special"),
+    "double_width": ("charset", "cjk", "width"),
+    "combining_chars": ("charset", "combining", "diacritics"),
+    "prompt_symbols": ("charset", "symbols", "ui"),
+}
+
+
+# HTML index fragments as string.Templates compiled once at import:
+# substitute() on a parsed template skips the brace scanning str.format
+# redoes per call, and CSS braces need no escaping. The head carries the
+# run summary so it is a template too.
+_HTML_HEAD = Template("""<!DOCTYPE html>
+<html>
+<head>
+    <title>Ghostty Visual Test Results</title>
+    <style>
+        body { font-family: sans-serif; margin: 40px; background: #f5f5f5; }
+        .test-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(400px, 1fr)); gap: 20px; }
+        .test-card { background: white; border-radius: 8px; padding: 15px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+        .test-card h3 { margin-top: 0; font-family: monospace; font-size: 14px; }
+        .test-card img { width: 100%; border: 1px solid #ddd; border-radius: 4px; }
+        .timestamp { color: #666; font-size: 12px; margin-top: 8px; }
+        .summary { color: #666; font-size: 14px; }
+    </style>
+</head>
+<body>
+    <h1>Ghostty Visual Test Results</h1>
+    <div class="summary">$total result(s), generated $generated</div>
+    <div class="test-grid">
+""")
+
+_HTML_CARD = Template("""
+        <div class="test-card">
+            <h3>$test_id</h3>
+            <img src="screenshots/$test_id.png" alt="$test_id">
+            <div class="timestamp">$timestamp</div>
+        </div>
+""")
+
+_HTML_FOOT = """
+    </div>
+</body>
+</html>
+"""
+
+
+def _marker_lines(stream, deadline: float) -> Iterator[str]:
+    """Yield decoded logcat lines containing "TEST_" from a binary stream.
+
+    Reads 64 KiB chunks and splits them on newlines as bytes, decoding
+    only candidate marker lines. Text-mode readline() would run the
+    UTF-8 decoder and a Python-level loop over every line, almost all
+    of which are dropped anyway.
+
+    A selector gates each read so the generator sleeps while logcat is
+    quiet but still returns when the deadline passes — a blocking read
+    would hang past the timeout if no line ever arrived.
+    """
+    sel = selectors.DefaultSelector()
+    sel.register(stream, selectors.EVENT_READ)
+    residual = b""
+    try:
+        # Sleep exactly the remaining window: one wakeup at deadline on
+        # a silent stream instead of a 1Hz polling tick, and the
+        # generator still can't overshoot the timeout.
+        while (remaining := deadline - time.time()) > 0:
+            if not sel.select(timeout=remaining):
+                return
+            chunk = stream.read1(65536)
+            if not chunk:
+                return
+            lines = (residual + chunk).split(b'\n')
+            residual = lines.pop()
+            for raw in lines:
+                if b"TEST_" in raw:
+                    yield raw.decode('utf-8', errors='replace')
+    finally:
+        sel.close()
+
+
+def _decode_raw_screencap(data: bytes) -> 'Image.Image':
+    """Decode a raw ``screencap`` dump (no -p) into a PIL image.
+
+    The dump is a little-endian header of width, height, pixel format
+    (and, since Android 9, colorspace) uint32s followed by the RGBA
+    framebuffer. Header length is inferred from the payload size so
+    both layouts decode. Returns None if the dump doesn't look like a
+    raw screencap.
+    """
+    if len(data) < 16:
+        return None
+    width, height = struct.unpack_from('<2I', data)
+    for header_size in (16, 12):
+        if len(data) - header_size == width * height * 4:
+            return Image.frombuffer(
+                'RGBA', (width, height), data[header_size:],
+                'raw', 'RGBA', 0, 1)
+    return None
+
+
+class AdbSession:
+    """A single long-lived ``adb shell`` session.
+
+    Every ``subprocess.run(["adb", "shell", ...])`` pays a fresh client
+    fork/exec plus adb server handshake (~50-200ms). Piping commands
+    into one persistent shell and reading back to a sentinel reduces
+    each device command to a stdin write — the dominant latency across
+    many tests x many adb calls. Commands that need binary stdout
+    (``adb exec-out``) still get their own process.
+    """
+
+    def __init__(self, serial: str = None):
+        adb = [adb_path()] if serial is None else [adb_path(), "-s", serial]
+        self._proc = subprocess.Popen(
+            adb + ["shell"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+
+    def run(self, cmd: str) -> int:
+        """Run a command in the session and return its exit code."""
+        self._proc.stdin.write(f"{cmd}; echo __DONE__$?\n")
+        self._proc.stdin.flush()
+        while True:
+            line = self._proc.stdout.readline()
+            if not line:
+                return -1
+            if "__DONE__" in line:
+                try:
+                    return int(line.split("__DONE__", 1)[1])
+                except ValueError:
+                    return -1
+
+    def run_capture(self, cmd: str) -> Tuple[int, str]:
+        """Like run(), but also return the command's output."""
+        self._proc.stdin.write(f"{cmd}; echo __DONE__$?\n")
+        self._proc.stdin.flush()
+        lines = []
+        while True:
+            line = self._proc.stdout.readline()
+            if not line:
+                return -1, "".join(lines)
+            if "__DONE__" in line:
+                before, rc_text = line.split("__DONE__", 1)
+                if before:
+                    lines.append(before)
+                try:
+                    return int(rc_text), "".join(lines)
+                except ValueError:
+                    return -1, "".join(lines)
+            lines.append(line)
+
+    def close(self) -> None:
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        self._proc.terminate()
+
+
+class SimpleTestRunner:
+    """Run visual tests on a device and capture screenshots."""
+
+    def __init__(self, output_dir: str, package: str = "com.ghostty.android",
+                 serial: str = None):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self.screenshots_dir = self.output_dir / "screenshots"
+        self.screenshots_dir.mkdir(exist_ok=True)
+
+        self.package = package
+        self.serial = serial
+        # Command prefix for the adb calls that can't share the shell
+        # session (logcat, exec-out); pins this runner to its device.
+        self.adb = [adb_path()] if serial is None else [adb_path(), "-s", serial]
+        self.results: List[Dict] = []
+
+        # Screenshots accumulate on-device during the run and are pulled
+        # in one tar stream at the end
+        self.device_shot_dir = "/sdcard/ghostty_test_shots"
+        self._shell = None
+        self._shell_lock = threading.Lock()
+        # Captures run off the monitoring thread so logcat keeps
+        # draining while screencap is busy; two workers cap the USB
+        # bandwidth contention.
+        self.capture_pool = ThreadPoolExecutor(max_workers=2)
+
+    def check_adb_connection(self) -> bool:
+        """Check if an Android device is connected."""
+        devices = get_devices()
+        if not devices:
+            print("❌ No Android devices connected")
+            return False
+        print(f"✓ Found {len(devices)} device(s) connected")
+        return True
+
+    def launch_app_in_test_mode(self, test_id: str) -> bool:
+        """Launch the app starting at a specific test.
+
+        Stop and start are batched into one shell invocation — a single
+        session write and sentinel read instead of two.
+        """
+        rc = self._shell.run(
+            f"am force-stop {self.package};"
+            f" am start -n {self.package}/.MainActivity"
+            f" --ez AUTO_START_TESTS true --es TEST_ID {shlex.quote(test_id)}")
+        if rc != 0:
+            print(f"❌ Failed to launch app (am start exit {rc})")
+            return False
+        return True
+
+    def _open_shell(self) -> None:
+        """Open the persistent adb shell session used for the run.
+
+        One session serves every launch and screencap, so each device
+        command costs a stdin write instead of a fresh adb client
+        handshake.
+        """
+        self._shell = AdbSession(self.serial)
+        self._shell.run(
+            f"rm -rf {self.device_shot_dir} && mkdir -p {self.device_shot_dir}")
+
+    def _close_shell(self) -> None:
+        if self._shell is None:
+            return
+        self._shell.close()
+        self._shell = None
+
+    def capture_screenshot(self, test_id: str) -> bool:
+        """Capture the device screen into the on-device shot directory.
+
+        With Pillow on the host, the capture is the raw RGBA
+        framebuffer (screencap without -p): on-device PNG zlib encode
+        is the slow step on high-res devices, and the host encodes far
+        faster. The raw dump stays on the device; pull_screenshots()
+        collects the whole directory in a single tar stream at the end
+        of the run and converts to PNG locally.
+        """
+        if HAS_PIL:
+            cmd = f"screencap {self.device_shot_dir}/{test_id}.raw"
+        else:
+            cmd = f"screencap -p {self.device_shot_dir}/{test_id}.png"
+        rc = self._shell.run(cmd)
+        if rc != 0:
+            print(f"  ❌ Screenshot failed (screencap exit {rc})")
+        return rc == 0
+
+    def pull_screenshots(self) -> int:
+        """Pull all captured screenshots in one tar stream.
+
+        exec-out streams an uncompressed tar of the device directory,
+        extracted on the fly — one adb round-trip for the whole run
+        instead of one per screenshot.
+        """
+        pulled = 0
+        proc = subprocess.Popen(
+            self.adb + ["exec-out", f"tar cf - -C {self.device_shot_dir} ."],
+            stdout=subprocess.PIPE
+        )
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode='r|') as tar:
+                for member in tar:
+                    if not member.isfile():
+                        continue
+                    name = Path(member.name).name
+                    if name.endswith('.raw'):
+                        # Raw dumps must be materialized — the decoder
+                        # needs the whole framebuffer.
+                        data = tar.extractfile(member).read()
+                        img = _decode_raw_screencap(data)
+                        if img is None:
+                            print(f"❌ Unrecognized screencap dump: {name}")
+                            continue
+                        img.save(self.screenshots_dir / f"{Path(name).stem}.png",
+                                 compress_level=1)
+                    elif name.endswith('.png'):
+                        # PNGs stream chunk-by-chunk from the tar pipe
+                        # to disk; the full image never sits in a
+                        # Python bytes object.
+                        with open(self.screenshots_dir / name, 'wb') as f:
+                            shutil.copyfileobj(tar.extractfile(member), f,
+                                               length=1 << 16)
+                    else:
+                        continue
+                    pulled += 1
+        except tarfile.TarError as e:
+            print(f"❌ Failed to pull screenshots: {e}")
+        finally:
+            proc.wait()
+            self._shell.run(f"rm -rf {self.device_shot_dir}")
+        return pulled
+
+    def monitor_and_capture(self, test_ids: List[str], timeout: int = 300) -> None:
+        """Run tests and capture a screenshot as each one becomes ready.
+
+        A single long-lived logcat subprocess is opened for the whole
+        run; TEST_READY markers from the in-app TestRunner trigger the
+        captures. No polling loop and no per-event adb spawn.
+        """
+        test_pattern = re.compile(r'TEST_(START|READY|COMPLETE):(\S+)')
+
+        self._open_shell()
+
+        # -T 1 starts the stream at "now" instead of replaying the
+        # whole historical buffer (which silenced-tag filtering would
+        # stream through the pipe anyway before dropping), and it makes
+        # the old separate `logcat -c` round-trip unnecessary. --pid
+        # can't be used here: each test relaunches the app with a fresh
+        # pid while this one logcat serves the entire run.
+        process = subprocess.Popen(
+            self.adb + ["logcat", "-v", "brief", "-T", "1",
+                        "TestRunner:I", "*:S"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=65536
+        )
+
+        pending = list(test_ids)
+        current = pending.pop(0)
+        print(f"\n[1/{len(test_ids)}] Running: {current}")
+        if not self.launch_app_in_test_mode(current):
+            process.terminate()
+            return
+
+        deadline = time.time() + timeout
+        futures = []
+
+        # Local aliases: attribute and method lookups inside the
+        # per-line loop cost a dict probe each; locals are array
+        # indexed. Matters during multi-thousand-line logcat bursts.
+        search = test_pattern.search
+        submit = self.capture_pool.submit
+        record = futures.append
+
+        try:
+            # _marker_lines does the binary chunked reads, the cheap
+            # substring prefilter, and the deadline-aware waiting; only
+            # marker candidates arrive here.
+            for line in _marker_lines(process.stdout, deadline):
+                match = search(line)
+                if not match:
+                    continue
+
+                event, test_id = match.groups()
+                if event != "READY" or test_id != current:
+                    continue
+
+                # Hand capture (and the chained next-launch) to the
+                # worker pool so this loop goes straight back to
+                # draining logcat instead of blocking behind screencap.
+                next_test = pending.pop(0) if pending else None
+                record(submit(
+                    self._capture_and_advance, test_id, next_test,
+                    len(futures) + 2, len(test_ids)))
+                if next_test is None:
+                    break
+                current = next_test
+
+            for future in futures:
+                future.result()
+        finally:
+            process.terminate()
+            self.capture_pool.shutdown(wait=True)
+            pulled = self.pull_screenshots()
+            self._shell.run(f"am force-stop {self.package}")
+            self._close_shell()
+            print(f"\n✓ Pulled {pulled} screenshot(s)")
+
+        done = len(futures)
+        if pending or done < len(test_ids):
+            print(f"\n⚠️  Timed out with {len(test_ids) - done} test(s) not captured")
+
+    def _capture_and_advance(self, test_id: str, next_test: str,
+                             next_index: int, total: int) -> None:
+        """Pool task: capture one test, then launch the next.
+
+        Runs off the monitoring thread. Tasks are naturally serialized
+        — the next READY can only arrive after this task launches the
+        next test — but the lock keeps the shared shell session safe
+        against duplicate markers.
+        """
+        with self._shell_lock:
+            captured = self.capture_screenshot(test_id)
+            status = "captured" if captured else "capture_failed"
+            print(f"  {'✓' if captured else '❌'} {test_id}: {status}")
+            # Epoch float, not datetime.now().isoformat(): the ISO
+            # string is only needed at report time, and time.time() is
+            # several times cheaper than building an aware datetime.
+            self.results.append({
+                "test_id": test_id,
+                "status": status,
+                "ts": time.time()
+            })
+            if next_test is not None:
+                print(f"\n[{next_index}/{total}] Running: {next_test}")
+                self.launch_app_in_test_mode(next_test)
+
+    def generate_report(self) -> None:
+        """Write the JSON report and HTML index."""
+        report_path = self.output_dir / "test_report.json"
+        # ISO timestamps are derived here, once per result, from the
+        # epoch floats recorded on the hot path.
+        report = {
+            "total": len(self.results),
+            "captured": sum(1 for r in self.results if r['status'] == 'captured'),
+            "failed": sum(1 for r in self.results if r['status'] != 'captured'),
+            "results": [
+                {**r, "timestamp": datetime.fromtimestamp(
+                    r['ts']).isoformat(timespec='seconds')}
+                for r in self.results
+            ]
+        }
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        print(f"\nReport saved to: {report_path}")
+        self.generate_html_index()
+
+    def generate_html_index(self) -> None:
+        """Generate a browsable HTML index of captured screenshots."""
+        html_path = self.output_dir / "index.html"
+
+        # Stream straight to the file: one write per card instead of
+        # growing (and re-copying) one big string per iteration.
+        with open(html_path, 'w', buffering=1 << 16) as f:
+            f.write(_HTML_HEAD.substitute(
+                total=len(self.results),
+                generated=datetime.now().isoformat(timespec='seconds'),
+            ))
+            for result in sorted(self.results, key=itemgetter('test_id')):
+                f.write(_HTML_CARD.substitute(
+                    test_id=result['test_id'],
+                    timestamp=datetime.fromtimestamp(
+                        result['ts']).isoformat(timespec='seconds'),
+                ))
+            f.write(_HTML_FOOT)
+
+        print(f"HTML index saved to: {html_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run Ghostty Android visual tests and capture screenshots"
+    )
+    parser.add_argument(
+        "--output", "-o",
+        required=True,
+        help="Output directory for screenshots and reports"
+    )
+    parser.add_argument(
+        "--test",
+        help="Run a specific test by ID"
+    )
+    parser.add_argument(
+        "--tag", "-t",
+        help="Run only tests with this tag"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=300,
+        help="Maximum time to wait for tests in seconds (default: 300)"
+    )
+    parser.add_argument(
+        "--package",
+        default="com.ghostty.android",
+        help="Android package name (default: com.ghostty.android)"
+    )
+
+    args = parser.parse_args()
+
+    if args.test:
+        if args.test not in _TEST_INDEX:
+            print(f"ERROR: Unknown test: {args.test}")
+            sys.exit(1)
+        test_ids = [args.test]
+    elif args.tag:
+        test_ids = [t for t in ALL_TESTS if args.tag in TEST_TAGS.get(t, ())]
+        if not test_ids:
+            print(f"ERROR: No tests with tag: {args.tag}")
+            sys.exit(1)
+    else:
+        test_ids = list(ALL_TESTS)
+
+    devices = get_devices()
+    if not devices:
+        print("❌ No Android devices connected")
+        sys.exit(1)
+    print(f"✓ Found {len(devices)} device(s) connected")
+
+    if len(devices) == 1:
+        runner = SimpleTestRunner(args.output, args.package)
+        runner.monitor_and_capture(test_ids, timeout=args.timeout)
+        runner.generate_report()
+        results = runner.results
+    else:
+        # One worker per device (Browserbite-style capture matrix):
+        # each runner owns a serial and an output subdirectory, and the
+        # whole suite runs on every device concurrently. The work is
+        # adb-I/O-bound, so threads are enough.
+        def run_device(serial: str) -> List[Dict]:
+            runner = SimpleTestRunner(
+                str(Path(args.output) / serial), args.package, serial=serial)
+            runner.monitor_and_capture(test_ids, timeout=args.timeout)
+            runner.generate_report()
+            return [dict(r, device=serial) for r in runner.results]
+
+        results = []
+        with ThreadPoolExecutor(max_workers=len(devices)) as executor:
+            for device_results in executor.map(run_device, devices):
+                results.extend(device_results)
+
+    captured = sum(1 for r in results if r['status'] == 'captured')
+    sys.exit(0 if captured == len(test_ids) * len(devices) else 1)
+
+
+if __name__ == "__main__":
+    main()
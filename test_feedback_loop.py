@@ -9,89 +9,278 @@ Usage:
 """
 
 import argparse
+import hashlib
 import json
 import os
+import re
+import select
+import shlex
+import socket
+import struct
 import subprocess
 import sys
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Optional
 
+from adb_utils import adb_path, get_devices
+from run_visual_tests import (
+    ALL_TESTS,
+    _TEST_INDEX,
+    AdbSession,
+    HAS_PIL,
+    _decode_raw_screencap,
+)
+
+
+class MinicapClient:
+    """Stream screen frames from minicap over a forwarded socket.
+
+    minicap serves JPEG frames at video rate on a localabstract socket,
+    so rapid re-shoots of the same screen cost one socket read instead
+    of the full screencap pipeline. The binary is ABI-specific and not
+    shipped here — it must already be on the device at
+    /data/local/tmp/minicap; start() reports False when it isn't and
+    callers fall back to screencap.
+    """
+
+    PORT = 1313
+
+    def __init__(self, session: AdbSession):
+        self._session = session
+        self._sock: Optional[socket.socket] = None
+
+    def start(self) -> bool:
+        """Start minicap on the device and connect to its socket."""
+        rc, out = self._session.run_capture("wm size")
+        match = re.search(r'(\d+)x(\d+)', out)
+        if match is None:
+            return False
+        size = f"{match.group(1)}x{match.group(2)}"
+
+        if self._session.run("test -x /data/local/tmp/minicap") != 0:
+            return False
+        self._session.run(
+            "LD_LIBRARY_PATH=/data/local/tmp nohup /data/local/tmp/minicap"
+            f" -P {size}@{size}/0 >/dev/null 2>&1 &")
+        subprocess.run(
+            [adb_path(), "forward", f"tcp:{self.PORT}", "localabstract:minicap"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+
+        # minicap needs a moment to bind its socket; retry the connect
+        # instead of sleeping a fixed interval.
+        deadline = time.time() + 5.0
+        while time.time() < deadline:
+            try:
+                self._sock = socket.create_connection(
+                    ("localhost", self.PORT), timeout=2.0)
+                break
+            except OSError:
+                time.sleep(0.1)
+        if self._sock is None:
+            return False
 
-# All available tests in order
-ALL_TESTS = [
-    "basic_colors_fg",
-    "basic_colors_bg",
-    "256_colors",
-    "rgb_colors",
-    "text_attributes",
-    "combined_attributes",
-    "cursor_position",
-    "cursor_movement",
-    "cursor_visibility",
-    "cursor_styles",
-    "screen_clear",
-    "line_operations",
-    "line_wrap_basic",
-    "line_wrap_word_boundary",
-    "line_wrap_ansi_colors",
-    "scrollback",
-    "utf8_basic",
-    "emoji",
-    "box_drawing",
-    "special_chars",
-    "double_width",
-    "combining_chars",
-    "prompt_symbols"
-]
+        # Banner: version byte, banner-length byte, then the rest
+        # (pid, display geometry, orientation, quirks).
+        head = self._read_exact(2)
+        if head is None:
+            return False
+        return self._read_exact(head[1] - 2) is not None
+
+    def _read_exact(self, n: int) -> Optional[bytes]:
+        chunks = []
+        while n > 0:
+            try:
+                chunk = self._sock.recv(n)
+            except OSError:
+                # The socket keeps create_connection's 2s timeout, and
+                # minicap only pushes frames on screen updates — a
+                # quiet screen (e.g. a launch that changed nothing) is
+                # a timeout here, not an error. Report no frame so the
+                # caller degrades to screencap.
+                return None
+            if not chunk:
+                return None
+            chunks.append(chunk)
+            n -= len(chunk)
+        return b"".join(chunks)
+
+    def _read_frame(self) -> Optional[bytes]:
+        header = self._read_exact(4)
+        if header is None:
+            return None
+        (length,) = struct.unpack('<I', header)
+        return self._read_exact(length)
+
+    def capture_frame(self) -> Optional[bytes]:
+        """Return the most recent JPEG frame from the stream.
+
+        minicap streams continuously, so frames queue up in the socket
+        between captures; reading just one would return whatever was
+        at the head of the buffer — a screen from seconds ago. Drain
+        everything already buffered and keep the last complete frame.
+        """
+        if self._sock is None:
+            return None
+        frame = self._read_frame()
+        if frame is None:
+            return None
+        while select.select([self._sock], [], [], 0)[0]:
+            newer = self._read_frame()
+            if newer is None:
+                break
+            frame = newer
+        return frame
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        subprocess.run(
+            [adb_path(), "forward", "--remove", f"tcp:{self.PORT}"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        self._session.run("pkill -f /data/local/tmp/minicap")
 
 
 class TestFeedbackLoop:
     """Automated screenshot capture for visual testing."""
 
-    def __init__(self, output_dir: str = "/tmp/feedback_tests"):
+    def __init__(self, output_dir: str = "/tmp/feedback_tests",
+                 use_minicap: bool = False, serial: Optional[str] = None):
+        self.serial = serial
+        # All one-shot adb invocations go through this prefix so a
+        # serial pins the loop to one device in multi-device runs.
+        self.adb = ([adb_path()] if serial is None
+                    else [adb_path(), "-s", serial])
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
         self.screenshots_dir = self.output_dir / "screenshots"
         self.screenshots_dir.mkdir(exist_ok=True)
+        # Precomputed string prefix for the capture hot path: plain
+        # concatenation instead of a fresh Path (and its normalization)
+        # per screenshot.
+        self._screenshot_prefix = str(self.screenshots_dir) + os.sep
 
         self.results_file = self.output_dir / "test_results.json"
+        # Incremental results are appended here as JSON lines; the
+        # consolidated test_results.json is only rewritten once at the
+        # end of a run instead of after every test.
+        self.results_log_path = self.output_dir / "results.jsonl"
+        self._results_log = None
+        # Guards results and the JSONL sidecar when shards record from
+        # worker threads.
+        self._record_lock = threading.Lock()
+        self._last_flush = 0.0
         self.results = self.load_results()
 
+        # One persistent adb shell for all device commands in the loop;
+        # opened on first use, closed when run_tests finishes.
+        self._shell: Optional[AdbSession] = None
+
+        # Optional high-rate capture path; started lazily on the first
+        # capture and silently degraded to screencap if unavailable.
+        self.use_minicap = use_minicap
+        self._minicap: Optional[MinicapClient] = None
+
+        # Launch time (ms) reported by the last `am start -W`, carried
+        # into that test's result record.
+        self._launch_ms: Optional[int] = None
+
+        # Dedupe state: digest of the previous test's frame bytes, so
+        # identical frames are symlinked instead of re-encoded and
+        # re-written. Only touched from the persist stage.
+        self._last_hash: Optional[bytes] = None
+        self._last_path: Optional[str] = None
+        self._last_id: Optional[str] = None
+
+    def _session(self) -> AdbSession:
+        if self._shell is None:
+            self._shell = AdbSession(self.serial)
+        return self._shell
+
     def load_results(self) -> Dict:
-        """Load previous test results if they exist."""
+        """Load previous test results if they exist.
+
+        Replays the JSONL sidecar on top of the consolidated file so
+        results from a run that ended without consolidating (crash,
+        Ctrl-C) are not lost.
+        """
+        results = {}
         if self.results_file.exists():
             with open(self.results_file, 'r') as f:
-                return json.load(f)
-        return {}
+                results = json.load(f)
+        if self.results_log_path.exists():
+            with open(self.results_log_path, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        results.update(json.loads(line))
+        return results
+
+    def record_result(self, test_id: str, entry: Dict) -> None:
+        """Record one result incrementally.
+
+        Appends a single compact JSON line instead of rewriting the
+        whole indented results file per test — full rewrites grow
+        O(N^2) in total bytes written over a run.
+        """
+        line = (json.dumps({test_id: entry}) + "\n").encode()
+        with self._record_lock:
+            self.results[test_id] = entry
+            if self._results_log is None:
+                # O_APPEND + one write(2) per record: the kernel makes
+                # each append atomic, so lines can never interleave
+                # even if shard workers end up with their own handles.
+                self._results_log = os.open(
+                    self.results_log_path,
+                    os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            os.write(self._results_log, line)
+
+    def save_results(self, force: bool = False):
+        """Consolidate all results to disk.
+
+        Unforced calls are throttled to one rewrite per 5s — the JSONL
+        sidecar already persists every result incrementally, so the
+        consolidated file only needs to exist eventually. The write
+        lands in a temp file first and os.replace()s into place, so a
+        crash mid-serialization never leaves a truncated results file.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_flush < 5.0:
+            return
+        self._last_flush = now
 
-    def save_results(self):
-        """Save test results to file."""
-        with open(self.results_file, 'w') as f:
-            json.dump(self.results, f, indent=2)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.output_dir, suffix=".json.tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.results, f, indent=2)
+            os.replace(tmp_path, self.results_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        if force:
+            if self._results_log is not None:
+                os.close(self._results_log)
+                self._results_log = None
+            self.results_log_path.unlink(missing_ok=True)
 
     def check_device(self) -> bool:
         """Check if Android device is connected."""
-        try:
-            result = subprocess.run(
-                ["adb", "devices"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            lines = result.stdout.strip().split('\n')
-            devices = [line for line in lines[1:] if line.strip()]
-
-            if not devices:
-                print("❌ No Android devices connected")
-                return False
-
-            print(f"✓ Found {len(devices)} device(s) connected")
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            print(f"❌ Error checking device: {e}")
+        devices = get_devices()
+        if not devices:
+            print("❌ No Android devices connected")
             return False
+        print(f"✓ Found {len(devices)} device(s) connected")
+        return True
 
     def launch_test(self, test_id: str) -> bool:
         """Launch app with specific test in manual navigation mode."""
@@ -99,37 +288,319 @@ class TestFeedbackLoop:
         print(f"  LAUNCHING TEST: {test_id}")
         print(f"{'='*60}\n")
 
-        # First, force-stop any existing instance
-        try:
-            subprocess.run(
-                ["adb", "shell", "am", "force-stop", "com.ghostty.android"],
-                capture_output=True,
-                check=True
-            )
-            print("✓ Stopped existing app instance")
-            time.sleep(1)  # Give it a moment to fully stop
-        except subprocess.CalledProcessError as e:
-            print(f"⚠️  Warning: Failed to stop app: {e}")
-
-        # Clear logcat
-        subprocess.run(["adb", "logcat", "-c"], capture_output=True)
-
-        # Launch app with specific test ID
-        cmd = [
-            "adb", "shell", "am", "start",
-            "-n", "com.ghostty.android/.MainActivity",
-            "--ez", "AUTO_START_TESTS", "true",
-            "--es", "TEST_ID", test_id
+        shell = self._session()
+
+        # One batched invocation instead of separate force-stop /
+        # am-start round-trips: a single write to the session and a
+        # single sentinel read. am start -W blocks until the activity
+        # is actually displayed — deterministic launch completion
+        # instead of racing downstream waits against it — and reports
+        # the launch time on stdout. The old logcat -c here cleared
+        # the *global* log buffer (racy with anything else tailing it)
+        # and is obsolete now that the marker monitor attaches before
+        # the launch.
+        rc, out = shell.run_capture(
+            "am force-stop com.ghostty.android;"
+            " am start -W -n com.ghostty.android/.MainActivity"
+            f" --ez AUTO_START_TESTS true --es TEST_ID {shlex.quote(test_id)}")
+        if rc != 0:
+            print(f"❌ Failed to launch app (am start exit {rc})")
+            return False
+        match = re.search(r'TotalTime:\s*(\d+)', out)
+        self._launch_ms = int(match.group(1)) if match else None
+        print("✓ App launched with manual navigation")
+        return True
+
+    def _start_marker_monitor(self, test_id: str) -> subprocess.Popen:
+        """Attach a logcat matcher for test_id's ready marker.
+
+        Started *before* the launch so a marker emitted in the first
+        frames can't slip past it. ``-T 1`` begins at "now" without
+        touching the global log buffer (the old ``logcat -c`` wiped it
+        for every other tool tailing the same log), and ``-e``/``-m 1``
+        make logcat do the matching and exit on the first hit, so no
+        log line ever crosses the adb pipe into Python.
+        """
+        cmd = self.adb + [
+            "logcat", "-v", "brief", "-T", "1",
+            "-m", "1",
+            "-e", rf'TEST_(READY|COMPLETE):{re.escape(test_id)}\b',
+            "TestRunner:I", "*:S"
         ]
-
+        return subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL)
+
+    def monitor_test_completion(self, test_id: str, timeout: int = 10,
+                                monitor: Optional[subprocess.Popen] = None
+                                ) -> bool:
+        """Wait for the in-app TestRunner to report test_id as ready.
+
+        Normally handed the monitor opened before the launch; opens one
+        on the spot for callers that didn't pre-attach.
+        """
+        if monitor is None:
+            monitor = self._start_marker_monitor(test_id)
+        try:
+            out, _ = monitor.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            monitor.kill()
+            monitor.communicate()
+            return False
+        return monitor.returncode == 0 and b"TEST_" in out
+
+    def _minicap_frame(self) -> Optional[bytes]:
+        """Return a JPEG frame from minicap, starting it on first use."""
+        if not self.use_minicap:
+            return None
+        if self._minicap is None:
+            client = MinicapClient(self._session())
+            if not client.start():
+                print("⚠️  minicap unavailable, falling back to screencap")
+                self.use_minicap = False
+                return None
+            self._minicap = client
+        return self._minicap.capture_frame()
+
+    def _grab_screen(self, test_id: str) -> tuple:
+        """Device-side capture stage: return (image bytes, suffix).
+
+        Default path is a one-shot ``adb exec-out screencap -p``; with
+        --use-minicap a streamed JPEG frame is grabbed instead, which
+        turns rapid re-shoots of the same screen from seconds into
+        milliseconds. Returns (None, suffix) on failure.
+        """
+        frame = self._minicap_frame()
+        if frame is not None:
+            return frame, ".jpg"
+
+        # Without -p screencap skips the device-side libpng encode
+        # (hundreds of ms on slower hardware) and dumps the raw RGBA
+        # framebuffer; the PNG is encoded on the host in the persist
+        # stage instead. -p stays as the no-PIL fallback.
+        cmd = self.adb + ["exec-out", "screencap"]
+        suffix = ".raw"
+        if not HAS_PIL:
+            cmd = cmd + ["-p"]
+            suffix = ".png"
+        result = subprocess.run(cmd, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL)
+        if result.returncode != 0 or not result.stdout:
+            return None, suffix
+        return result.stdout, suffix
+
+    def _write_screenshot(self, test_id: str, data: bytes,
+                          suffix: str) -> Optional[str]:
+        """Host-side persistence stage: write bytes, return the path.
+
+        Raw framebuffer dumps are decoded and PNG-encoded here, on the
+        host and off the device's critical path, with the fast
+        compress_level=1 setting.
+        """
+        if suffix == ".raw":
+            img = _decode_raw_screencap(data)
+            if img is None:
+                return None
+            local_path = self._screenshot_prefix + test_id + ".png"
+            img.save(local_path, compress_level=1)
+            return local_path
+
+        local_path = self._screenshot_prefix + test_id + suffix
+        # Raw fd write: one syscall, no BufferedWriter copy of the
+        # multi-megabyte image before it reaches the kernel.
+        fd = os.open(local_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
         try:
-            subprocess.run(cmd, capture_output=True, text=True, check=True)
-            print("✓ App launched with manual navigation")
-            return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Failed to launch app: {e}")
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        return local_path
+
+    def capture_screenshot(self, test_id: str) -> bool:
+        """Capture the current screen to the host."""
+        data, suffix = self._grab_screen(test_id)
+        if data is None:
+            print(f"❌ Screenshot failed for {test_id}")
+            return False
+        path = self._write_screenshot(test_id, data, suffix)
+        if path is None:
+            print(f"❌ Unrecognized screencap dump for {test_id}")
+            return False
+        print(f"✓ Screenshot saved: {path}")
+        return True
+
+    def _persist_and_record(self, test_id: str, data: Optional[bytes],
+                            suffix: str,
+                            launch_ms: Optional[int] = None) -> bool:
+        """Pipeline tail: write the screenshot and record its result.
+
+        launch_ms is passed in rather than read from self: the caller
+        snapshots it at submit time, so the persist worker can't pick
+        up the launch time of whatever test the main loop has moved on
+        to by the time this runs.
+        """
+        if data is not None:
+            # Hash the grabbed bytes before any encode: a frame
+            # identical to the previous test's (e.g. a launch that
+            # never changed the screen) gets a symlink, not another
+            # PNG encode + multi-megabyte write.
+            digest = hashlib.blake2b(data, digest_size=16).digest()
+            if digest == self._last_hash and self._last_path is not None:
+                link_path = (self._screenshot_prefix + test_id
+                             + os.path.splitext(self._last_path)[1])
+                try:
+                    if os.path.lexists(link_path):
+                        os.unlink(link_path)
+                    os.symlink(self._last_path, link_path)
+                except OSError:
+                    pass
+                print(f"≡ Screenshot identical to {self._last_id}: {link_path}")
+                self.record_result(test_id, {
+                    "status": "captured",
+                    "duplicate_of": self._last_id,
+                    "ts": time.time()
+                })
+                return True
+
+        path = None if data is None else self._write_screenshot(
+            test_id, data, suffix)
+        if path is None:
+            print(f"❌ Screenshot failed for {test_id}")
+            self.record_result(test_id, {
+                "status": "capture_failed",
+                "ts": time.time()
+            })
             return False
+        print(f"✓ Screenshot saved: {path}")
+        self._last_hash = digest
+        self._last_path = path
+        self._last_id = test_id
+        entry = {"status": "captured", "ts": time.time()}
+        if launch_ms is not None:
+            entry["launch_ms"] = launch_ms
+        self.record_result(test_id, entry)
+        return True
+
+    def run_single_test(self, test_id: str) -> bool:
+        """Launch one test, wait for its ready marker, then capture.
+
+        Fully event-driven: every wait keys off the TEST_START /
+        TEST_READY markers the app already emits, with no fixed sleeps
+        padding the loop — TEST_READY is the device's own "frame is
+        rendered" signal, so capture can follow it immediately.
+        """
+        monitor = self._start_marker_monitor(test_id)
+        if not self.launch_test(test_id):
+            monitor.kill()
+            monitor.communicate()
+            self.record_result(test_id, {
+                "status": "launch_failed",
+                "ts": time.time()
+            })
+            return False
+
+        if not self.monitor_test_completion(test_id, timeout=15,
+                                            monitor=monitor):
+            self.record_result(test_id, {
+                "status": "no_marker",
+                "ts": time.time()
+            })
+            return False
+
+        data, suffix = self._grab_screen(test_id)
+        return self._persist_and_record(test_id, data, suffix,
+                                        self._launch_ms)
+
+    def run_loop(self, test_ids: Optional[List[str]] = None) -> None:
+        """Run the automated capture loop over the given tests.
 
+        With several devices attached (and no serial pinned) the tests
+        are sharded round-robin across all of them — wall time is
+        dominated by per-device launch/render/capture latency, so the
+        speedup is near-linear in device count.
+        """
+        test_ids = list(test_ids or ALL_TESTS)
+
+        devices = get_devices()
+        if not devices:
+            print("❌ No Android devices connected")
+            return
+        print(f"✓ Found {len(devices)} device(s) connected")
+
+        if len(devices) > 1 and self.serial is None:
+            passed = self._run_sharded(devices, test_ids)
+        else:
+            passed = self._run_shard(test_ids)
+            self._close_device_handles()
+
+        self.save_results(force=True)
+        print(f"\n{'='*60}")
+        print(f"  CAPTURED {passed}/{len(test_ids)} TESTS")
+        print(f"{'='*60}")
+
+    def _run_shard(self, test_ids: List[str]) -> int:
+        """Run a batch of tests on this loop's device, pipelined.
+
+        The device-side stages are inherently serial — the screen must
+        hold still from launch through framebuffer grab — but once
+        exec-out has returned the bytes, writing them out and recording
+        the result is host-only work. That tail stage runs on a single
+        worker thread, overlapped with the next test's launch + render
+        window, hiding the multi-megabyte disk write behind device
+        latency.
+        """
+        persist = ThreadPoolExecutor(max_workers=1)
+        futures = []
+        try:
+            for test_id in test_ids:
+                monitor = self._start_marker_monitor(test_id)
+                if not self.launch_test(test_id):
+                    monitor.kill()
+                    monitor.communicate()
+                    self.record_result(test_id, {
+                        "status": "launch_failed",
+                        "ts": time.time()
+                    })
+                    continue
+                if not self.monitor_test_completion(test_id, timeout=15,
+                                                    monitor=monitor):
+                    self.record_result(test_id, {
+                        "status": "no_marker",
+                        "ts": time.time()
+                    })
+                    continue
+                data, suffix = self._grab_screen(test_id)
+                futures.append(persist.submit(
+                    self._persist_and_record, test_id, data, suffix,
+                    self._launch_ms))
+        finally:
+            persist.shutdown(wait=True)
+        return sum(1 for f in futures if f.result())
+
+    def _run_sharded(self, devices: List[str], test_ids: List[str]) -> int:
+        """Partition test_ids round-robin and run one worker per device."""
+        shards = [test_ids[i::len(devices)] for i in range(len(devices))]
+
+        def run_worker(args: tuple) -> int:
+            serial, shard = args
+            worker = TestFeedbackLoop(str(self.output_dir), serial=serial)
+            # Workers funnel results through this instance so one lock
+            # serializes the JSONL sidecar and one consolidation
+            # happens at the end instead of per worker.
+            worker.record_result = self.record_result
+            try:
+                return worker._run_shard(shard)
+            finally:
+                worker._close_device_handles()
+
+        with ThreadPoolExecutor(max_workers=len(devices)) as executor:
+            return sum(executor.map(run_worker, zip(devices, shards)))
+
+    def _close_device_handles(self) -> None:
+        if self._minicap is not None:
+            self._minicap.close()
+            self._minicap = None
+        if self._shell is not None:
+            self._shell.close()
+            self._shell = None
 
     def run_tests(self, test_id: str = "all"):
         """Run tests with manual navigation."""
@@ -145,11 +616,33 @@ class TestFeedbackLoop:
         if not self.check_device():
             return
 
+        # Attach the marker monitor before launching — am start -W
+        # blocks until the activity is displayed, so a marker emitted
+        # during launch would already be gone by the time a
+        # post-launch monitor attached.
+        monitor = (self._start_marker_monitor(test_id)
+                   if test_id != "all" else None)
+
         # Launch app with specified test ID
         if not self.launch_test(test_id):
+            if monitor is not None:
+                monitor.kill()
+                monitor.communicate()
             print("❌ Failed to launch app")
             return
 
+        if test_id != "all":
+            rendered = self.monitor_test_completion(test_id,
+                                                    monitor=monitor)
+            if rendered:
+                print(f"✓ Test rendered: {test_id}")
+            else:
+                print(f"⚠️  No ready marker seen for: {test_id}")
+            self.record_result(test_id, {
+                "status": "rendered" if rendered else "no_marker",
+                "ts": time.time()
+            })
+
         print("\n✅ App launched with manual navigation")
         print("📱 Navigate tests using the on-screen buttons")
         print("⌨️  Press Enter to stop...")
@@ -161,15 +654,13 @@ class TestFeedbackLoop:
             pass
 
         # Stop the app when done
-        try:
-            subprocess.run(
-                ["adb", "shell", "am", "force-stop", "com.ghostty.android"],
-                capture_output=True,
-                check=True
-            )
+        if self._session().run("am force-stop com.ghostty.android") == 0:
             print("✓ Stopped app")
-        except subprocess.CalledProcessError as e:
-            print(f"⚠️  Warning: Failed to stop app: {e}")
+        else:
+            print("⚠️  Warning: Failed to stop app")
+
+        self._close_device_handles()
+        self.save_results(force=True)
 
 
 def main():
@@ -186,14 +677,33 @@ def main():
         default="/tmp/feedback_tests",
         help="Output directory for results (default: /tmp/feedback_tests)"
     )
+    parser.add_argument(
+        "--auto",
+        action="store_true",
+        help="Run the automated capture loop instead of manual navigation"
+    )
+    parser.add_argument(
+        "--use-minicap",
+        action="store_true",
+        help="Capture via a streamed minicap socket instead of screencap "
+             "(requires minicap at /data/local/tmp/minicap on the device)"
+    )
 
     args = parser.parse_args()
 
+    # Fail on a typoed test id before any adb round-trip is spent.
+    if args.test_id != "all" and args.test_id not in _TEST_INDEX:
+        print(f"ERROR: Unknown test: {args.test_id}")
+        sys.exit(1)
+
     # Create feedback loop instance
-    loop = TestFeedbackLoop(args.output)
+    loop = TestFeedbackLoop(args.output, use_minicap=args.use_minicap)
 
-    # Run tests with manual navigation
-    loop.run_tests(args.test_id)
+    if args.auto:
+        loop.run_loop(None if args.test_id == "all" else [args.test_id])
+    else:
+        # Run tests with manual navigation
+        loop.run_tests(args.test_id)
 
 
 if __name__ == "__main__":
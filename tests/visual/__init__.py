@@ -0,0 +1,4 @@
+"""Visual regression test framework for Ghostty Android.
+
+See tests/README.md for the architecture overview and usage.
+"""
@@ -0,0 +1,310 @@
+"""ADB device interaction for the visual regression tests.
+
+Wraps the handful of adb operations the test runner needs — app
+lifecycle, key/text input, screenshots — behind one controller that can
+be pinned to a device serial for multi-device runs.
+"""
+
+import selectors
+import shlex
+import shutil
+import struct
+import subprocess
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+PACKAGE = "com.ghostty.android"
+ACTIVITY = f"{PACKAGE}/.MainActivity"
+
+# Single-pass escape table for `input text`: spaces must be sent as %s,
+# and since the result lands inside a single-quoted shell argument,
+# apostrophes must close the quote, escape, and reopen ('\'') — the
+# shell ignores backslashes inside single quotes. str.translate walks
+# the string once, where chained str.replace calls would walk it once
+# per rule.
+_TEXT_TABLE = str.maketrans({
+    " ": "%s",
+    "'": r"'\''",
+})
+
+
+class ADBController:
+    """Drive one Android device over adb."""
+
+    # Key-name -> keyevent mapping, built once at class creation rather
+    # than per send_key call.
+    KEY_MAP = {
+        "Return": "KEYCODE_ENTER",
+        "Tab": "KEYCODE_TAB",
+        "Escape": "KEYCODE_ESCAPE",
+        "Space": "KEYCODE_SPACE",
+        "BackSpace": "KEYCODE_DEL",
+        "Up": "KEYCODE_DPAD_UP",
+        "Down": "KEYCODE_DPAD_DOWN",
+        "Left": "KEYCODE_DPAD_LEFT",
+        "Right": "KEYCODE_DPAD_RIGHT",
+        "Home": "KEYCODE_MOVE_HOME",
+        "End": "KEYCODE_MOVE_END",
+    }
+
+    # Sentinel echoed after every command in the persistent shell so
+    # the reader knows where output ends and what the exit status was.
+    _SENTINEL = "__DONE__"
+
+    def __init__(self, device_serial: Optional[str] = None):
+        self.device_serial = device_serial
+        # Resolve adb once so subprocess spawns skip the per-call
+        # $PATH walk.
+        self._adb = shutil.which("adb") or "adb"
+        self._base_cmd = ([self._adb] if device_serial is None
+                          else [self._adb, "-s", device_serial])
+        # One long-lived `adb shell` for all text commands: each
+        # subprocess.run paid a fresh client fork plus adb server
+        # handshake (~100-300ms), several times per test for input
+        # actions alone. Opened lazily, reopened if it dies. Binary
+        # transfers (screenshots) stay on exec-out — framing raw PNG
+        # bytes through a text-mode shell would corrupt them.
+        self._session: Optional[subprocess.Popen] = None
+
+    def _ensure_session(self) -> subprocess.Popen:
+        if self._session is None or self._session.poll() is not None:
+            # Binary pipes: the reader selects on the raw fd with a
+            # deadline, which the text wrapper's internal buffering
+            # would defeat (select would report quiet while decoded
+            # lines sat in the wrapper).
+            self._session = subprocess.Popen(
+                self._base_cmd + ["shell"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT
+            )
+        return self._session
+
+    def _shell(self, cmd: str, timeout: float = 10) -> subprocess.CompletedProcess:
+        proc = self._ensure_session()
+        deadline = time.time() + timeout
+        sentinel = self._SENTINEL.encode()
+        try:
+            proc.stdin.write(f"{cmd}; echo {self._SENTINEL}$?\n".encode())
+            proc.stdin.flush()
+            # Selector-gated reads so the deadline holds even when the
+            # device command hangs and never prints the sentinel; a
+            # plain blocking read would discard the caller's timeout.
+            sel = selectors.DefaultSelector()
+            sel.register(proc.stdout, selectors.EVENT_READ)
+            try:
+                out_lines = []
+                residual = b""
+                while (remaining := deadline - time.time()) > 0:
+                    if not sel.select(timeout=remaining):
+                        break
+                    chunk = proc.stdout.read1(4096)
+                    if not chunk:
+                        break
+                    lines = (residual + chunk).split(b"\n")
+                    residual = lines.pop()
+                    for line in lines:
+                        line = line.rstrip(b"\r")
+                        if line.startswith(sentinel):
+                            rc = int(line[len(sentinel):] or b"1")
+                            out = b"\n".join(out_lines).decode(
+                                errors="replace")
+                            return subprocess.CompletedProcess(
+                                cmd, rc, out, "")
+                        out_lines.append(line)
+            finally:
+                sel.close()
+        except (BrokenPipeError, OSError, ValueError):
+            pass
+        # Timed out or the shell died mid-command: kill the session so
+        # stale output can't bleed into the next command's read.
+        self.close()
+        return subprocess.CompletedProcess(cmd, 1, "", "")
+
+    def close(self) -> None:
+        """Tear down the persistent shell, if one was opened."""
+        if self._session is None:
+            return
+        try:
+            self._session.stdin.close()
+            self._session.terminate()
+            self._session.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self._session.kill()
+        self._session = None
+
+    def is_connected(self) -> bool:
+        """Check the device responds to adb at all."""
+        try:
+            return self._shell("true").returncode == 0
+        except FileNotFoundError:
+            return False
+
+    def launch_app(self, test_id: Optional[str] = None) -> bool:
+        """Force-stop and relaunch the app, optionally into a test."""
+        cmd = f"am force-stop {PACKAGE}; am start -n {ACTIVITY}"
+        if test_id is not None:
+            cmd += (" --ez AUTO_START_TESTS true"
+                    f" --es TEST_ID {shlex.quote(test_id)}")
+        return self._shell(cmd, timeout=15).returncode == 0
+
+    def stop_app(self) -> bool:
+        return self._shell(f"am force-stop {PACKAGE}").returncode == 0
+
+    def is_app_running(self) -> bool:
+        result = self._shell(f"pidof -s {PACKAGE}")
+        return result.returncode == 0 and bool(result.stdout.strip())
+
+    def clear_logcat(self) -> None:
+        subprocess.run(self._base_cmd + ["logcat", "-c"],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def send_key(self, key: str) -> bool:
+        """Send a named key (see KEY_MAP) or a raw keyevent."""
+        keyevent = self.KEY_MAP.get(key, key)
+        return self._shell(f"input keyevent {keyevent}").returncode == 0
+
+    def send_text(self, text: str) -> bool:
+        """Type text into the focused view."""
+        escaped = text.translate(_TEXT_TABLE)
+        return self._shell(f"input text '{escaped}'").returncode == 0
+
+    def execute_actions_batch(self, actions) -> bool:
+        """Run a sequence of type/key/sleep actions as one command.
+
+        Dispatching actions one by one costs a device round-trip per
+        keystroke; concatenating them into a single shell line (with
+        sleeps running on-device) makes a whole action sequence one
+        round-trip. Host-side waits (wait_stable) can't batch — the
+        caller splits around them.
+        """
+        parts = []
+        total_sleep = 0.0
+        for action in actions:
+            if action.kind == "type":
+                escaped = action.value.translate(_TEXT_TABLE)
+                parts.append(f"input text '{escaped}'")
+            elif action.kind == "key":
+                keyevent = self.KEY_MAP.get(action.value, action.value)
+                parts.append(f"input keyevent {keyevent}")
+            elif action.kind == "sleep":
+                parts.append(f"sleep {action.value}")
+                total_sleep += action.value
+            else:
+                raise ValueError(f"cannot batch action: {action!r}")
+        if not parts:
+            return True
+        return self._shell("; ".join(parts),
+                           timeout=10 + total_sleep).returncode == 0
+
+    @staticmethod
+    def _decode_raw_screencap(data: bytes) -> Optional["Image.Image"]:
+        """Decode a raw (no -p) screencap dump into a PIL image.
+
+        The header is width/height/format as little-endian uint32,
+        with a colorspace word appended on newer Android releases;
+        which variant we got is detected from the payload size.
+        """
+        if len(data) < 16:
+            return None
+        w, h = struct.unpack_from('<2I', data)
+        for header in (16, 12):
+            if len(data) - header == w * h * 4:
+                return Image.frombuffer(
+                    'RGBA', (w, h), data[header:], 'raw', 'RGBA', 0, 1)
+        return None
+
+    def capture_screenshot(self, output_path: Path,
+                           compress_level: int = 1) -> bool:
+        """Capture the screen to a local file.
+
+        One exec-out invocation with no sdcard staging. With Pillow
+        available the framebuffer is pulled raw and PNG-encoded on the
+        host at a low compression level — the device's own screencap -p
+        encodes at zlib default, hundreds of ms of device CPU for an
+        intermediate the compare step only needs re-readable. Falls
+        back to device-side PNG without Pillow.
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if HAS_PIL:
+            try:
+                result = subprocess.run(
+                    self._base_cmd + ["exec-out", "screencap"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    timeout=10
+                )
+            except subprocess.TimeoutExpired:
+                return False
+            if result.returncode == 0:
+                img = self._decode_raw_screencap(result.stdout)
+                if img is not None:
+                    img.save(output_path, compress_level=compress_level)
+                    return True
+            return False
+        try:
+            with open(output_path, 'wb') as f:
+                result = subprocess.run(
+                    self._base_cmd + ["exec-out", "screencap", "-p"],
+                    stdout=f,
+                    stderr=subprocess.DEVNULL,
+                    timeout=10
+                )
+        except subprocess.TimeoutExpired:
+            return False
+        return result.returncode == 0 and output_path.stat().st_size > 0
+
+    def capture_screenshot_bytes(self) -> Optional[bytes]:
+        """Capture the screen into memory, without touching disk.
+
+        Used by stability polling, where frames are hashed and thrown
+        away — writing them out would just add I/O to a busy-wait.
+        """
+        try:
+            result = subprocess.run(
+                self._base_cmd + ["exec-out", "screencap", "-p"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=10
+            )
+        except subprocess.TimeoutExpired:
+            return None
+        if result.returncode != 0 or not result.stdout:
+            return None
+        return result.stdout
+
+    def wait_for_marker(self, marker: str, timeout: float = 10) -> bool:
+        """Block until a logcat line matching marker appears.
+
+        logcat matches with -e and exits on the first hit (-m 1), so no
+        log line is streamed to the host.
+        """
+        cmd = self._base_cmd + [
+            "logcat", "-v", "brief", "-T", "1",
+            "-m", "1", "-e", marker,
+            "TestRunner:I", "*:S"
+        ]
+        try:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL,
+                                    timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return False
+        return result.returncode == 0 and bool(result.stdout)
+
+    def wait_for_app(self, timeout: float = 5.0) -> bool:
+        """Wait for the app process to exist after a launch."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.is_app_running():
+                return True
+            time.sleep(0.2)
+        return False
@@ -0,0 +1,28 @@
+"""Test discovery for the visual regression cases.
+
+Discovery is lazy on purpose: a CLI run pinned to one test (or just
+--list) should not pay the import cost of every case module, and
+importing this package must not touch the filesystem or mutate
+sys.path.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import List
+
+
+def reference_dir() -> Path:
+    """Directory holding the Ghostty OSS reference images.
+
+    Resolved on demand rather than at import time — the path only
+    matters once a case is actually compared.
+    """
+    return (Path(__file__).resolve().parents[3]
+            / "libghostty-vt" / "test" / "cases")
+
+
+@lru_cache(maxsize=1)
+def get_all_tests() -> List:
+    """Return every test case, importing the case modules on first use."""
+    from . import vttest, wraptest
+    return vttest.get_tests() + wraptest.get_tests()
@@ -0,0 +1,68 @@
+"""VT test suite cases, converted from libghostty-vt/test/cases.
+
+Each case drives vttest through its menu and screenshots the resulting
+screen. Menu choices map to the vttest main-menu numbering. Launching
+vttest (and entering main-menu section 1) is declared as a shared
+setup prologue rather than inlined per case, so consecutive cases with
+the same prologue reuse the running vttest instead of replaying the
+launch chain every time.
+"""
+
+from typing import List, Optional
+
+from ..test_case import Action, TestCase
+from . import reference_dir
+
+# Shared prologues: _LAUNCH starts vttest; _MENU_1 starts it and
+# enters main-menu section 1, where all the cursor/screen subtests
+# live. Tuples, not lists — pure data shared by reference across every
+# case, built exactly once at import and impossible for one case to
+# mutate under another's feet.
+_LAUNCH = (
+    Action("type", "vttest"),
+    Action("key", "Return"),
+    Action("wait_stable", 2.0),
+)
+_MENU_1 = _LAUNCH + (
+    Action("type", "1"),
+    Action("key", "Return"),
+    Action("wait_stable", 2.0),
+)
+
+
+def _vttest_case(name: str, description: str,
+                 choice: Optional[str] = None) -> TestCase:
+    test = TestCase(name=name, description=description)
+    if choice is None:
+        test.set_setup("vttest", _LAUNCH)
+    else:
+        # Only the subtest number is this case's own work; the launch
+        # and section-1 entry are shared with the sibling cases. The
+        # teardown Return dismisses the subtest's "Push <RETURN>"
+        # screen back to the section menu, so every sibling starts
+        # from the same post-setup state no matter which (if any) ran
+        # before it on this worker.
+        test.set_setup("vttest:1", _MENU_1)
+        test.add_type(choice)
+        test.add_key("Return")
+        test.add_wait_stable()
+        test.set_teardown((
+            Action("key", "Return"),
+            Action("wait_stable", 2.0),
+        ))
+    test.reference_image = reference_dir() / f"{name}.sh.ghostty.png"
+    return test
+
+
+def get_tests() -> List[TestCase]:
+    # Order matters: cases sharing a setup_key are adjacent so each
+    # worker pays the prologue once for the whole stretch.
+    return [
+        _vttest_case("vttest_launch", "Menu display"),
+        _vttest_case("vttest_1_1", "Cursor movements", "1"),
+        _vttest_case("vttest_1_2", "Screen features", "2"),
+        _vttest_case("vttest_1_3", "Character sets", "3"),
+        _vttest_case("vttest_1_4", "Double-sized characters", "4"),
+        _vttest_case("vttest_1_5", "Keyboard test", "5"),
+        _vttest_case("vttest_1_6", "Terminal reports", "6"),
+    ]
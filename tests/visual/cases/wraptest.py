@@ -0,0 +1,18 @@
+"""Line-wrapping test case, converted from libghostty-vt/test/cases."""
+
+from typing import List
+
+from ..test_case import TestCase
+from . import reference_dir
+
+
+def get_tests() -> List[TestCase]:
+    test = TestCase(
+        name="wraptest",
+        description="Line wrapping matrix"
+    )
+    test.add_type("wraptest")
+    test.add_key("Return")
+    test.add_sleep(2.0)
+    test.reference_image = reference_dir() / "wraptest.sh.ghostty.png"
+    return [test]
@@ -0,0 +1,143 @@
+"""Image comparison for the visual regression tests.
+
+Comparison runs in-process: both PNGs are decoded once with Pillow and
+the AE (absolute error) pixel count is computed with vectorized NumPy.
+The previous backend shelled out to ImageMagick ``compare`` per test —
+a fork/exec plus a second decode of both images in another address
+space — for a workload that is a single memory-bound pass over the
+pixels. Returns the number of differing pixels, or -1 when the images
+can't be compared (size mismatch, decode failure).
+"""
+
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import numpy as np
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+try:
+    import imagehash
+    HAS_IMAGEHASH = True
+except ImportError:
+    HAS_IMAGEHASH = False
+
+
+# File-content hashes keyed by (path, mtime_ns), so reference PNGs are
+# hashed once per run rather than once per compare. blake2b runs at
+# multi-GB/s, so the pre-check is O(file size), not O(pixels).
+_hash_cache: Dict[Tuple[str, int], bytes] = {}
+
+
+def _file_hash(path: Path) -> bytes:
+    key = (str(path), path.stat().st_mtime_ns)
+    digest = _hash_cache.get(key)
+    if digest is None:
+        digest = hashlib.blake2b(path.read_bytes(), digest_size=16).digest()
+        _hash_cache[key] = digest
+    return digest
+
+
+@lru_cache(maxsize=64)
+def _load_image(path_str: str, mtime_ns: int):
+    """Decode a PNG to a contiguous uint8 [H, W, 4] RGBA array, memoized.
+
+    PNG zlib decompression dominates a compare once forking is gone;
+    reference images recur across tests and retries, so they are
+    decoded once per (path, mtime) instead of per call. The LRU bound
+    keeps resident arrays to a few dozen screens. RGBA rather than RGB
+    so each pixel is 4 bytes and the comparison can view the buffer as
+    one uint32 lane per pixel.
+    """
+    return np.asarray(Image.open(path_str).convert("RGBA"))
+
+
+@lru_cache(maxsize=64)
+def _phash(path_str: str, mtime_ns: int):
+    return imagehash.phash(Image.open(path_str))
+
+
+class PerceptualImageCompare:
+    """Perceptual (pHash) comparison, tolerant of rendering noise.
+
+    The hash is a 64-bit signature of the image's 8x8 DCT, so two
+    screenshots that differ only in anti-aliasing or sub-pixel text
+    rendering hash close together. Hashes are memoized alongside the
+    decoded reference arrays.
+    """
+
+    @staticmethod
+    def distance(actual: Path, reference: Path) -> int:
+        """Hamming distance between the two images' perceptual hashes."""
+        return (_phash(str(actual), actual.stat().st_mtime_ns)
+                - _phash(str(reference), reference.stat().st_mtime_ns))
+
+
+class PillowImageCompare:
+    """In-process pixel comparison (Pillow decode, NumPy compare)."""
+
+    @staticmethod
+    def compare(actual: Path, reference: Path,
+                diff_path: Optional[Path] = None) -> int:
+        a = _load_image(str(actual), actual.stat().st_mtime_ns)
+        b = _load_image(str(reference), reference.stat().st_mtime_ns)
+        if a.shape != b.shape:
+            return -1
+
+        # AE metric: count of pixels differing in any channel. Viewing
+        # the RGBA buffers as one uint32 per pixel turns the strided
+        # byte compare plus axis reduction into a single full-width
+        # integer compare per pixel — one SIMD lane per pixel instead
+        # of three byte lanes and a reduce.
+        h, w = a.shape[:2]
+        a32 = a.view(np.uint32).reshape(h, w)
+        b32 = b.view(np.uint32).reshape(h, w)
+
+        # Tile the count into ~256KB row blocks. A 1080p frame is ~8MB
+        # per image as uint32 — two inputs plus a full-frame bool
+        # temporary blow out L2 — whereas per-tile the reads, compare
+        # and popcount all stay cache-resident, and the temporary
+        # shrinks to one tile.
+        rows_per_tile = max(1, (256 * 1024) // (w * 4 * 2))
+        pixel_diff = 0
+        for y in range(0, h, rows_per_tile):
+            pixel_diff += int(np.count_nonzero(
+                a32[y:y + rows_per_tile] != b32[y:y + rows_per_tile]))
+
+        if diff_path is not None and pixel_diff > 0:
+            # Amplify the (usually subtle) differences so they are
+            # visible in the saved diff image — one vectorized
+            # expression instead of Image.point's per-pixel lambda.
+            delta = np.abs(a[..., :3].astype(np.int16) - b[..., :3])
+            amplified = (np.clip(delta, 0, 25) * 10).astype(np.uint8)
+            Image.fromarray(amplified).save(diff_path)
+        return pixel_diff
+
+
+def compare_images(actual: Path, reference: Path,
+                   diff_path: Optional[Path] = None,
+                   perceptual_threshold: Optional[int] = None) -> int:
+    """Compare two images with the in-process NumPy backend.
+
+    Byte-identical files — the common case in a green run — are
+    detected by content hash and short-circuit to zero without
+    decoding either PNG. With a perceptual_threshold set (and
+    imagehash installed), images whose pHash Hamming distance is
+    within it also count as matching, absorbing anti-aliasing and
+    text-rendering variance between devices; anything further apart
+    falls through to the exact AE pass so failures stay localized.
+    """
+    if not HAS_PIL:
+        raise RuntimeError("No comparison backend: install Pillow and NumPy")
+    if _file_hash(actual) == _file_hash(reference):
+        return 0
+    if (perceptual_threshold is not None and HAS_IMAGEHASH
+            and PerceptualImageCompare.distance(actual, reference)
+            <= perceptual_threshold):
+        return 0
+    return PillowImageCompare.compare(actual, reference, diff_path)
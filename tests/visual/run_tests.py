@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+CLI entry point for the visual regression tests.
+
+Usage:
+    python run_tests.py                    # run everything
+    python run_tests.py --test vttest_1_1  # one test
+    python run_tests.py --list             # list test names
+    python run_tests.py --devices s1,s2 --workers 2
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Support both `python run_tests.py` from this directory and
+# `python -m tests.visual.run_tests` from the repo root.
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from tests.visual.cases import get_all_tests
+    from tests.visual.test_runner import TestRunner
+else:
+    from .cases import get_all_tests
+    from .test_runner import TestRunner
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Ghostty Android visual regression tests")
+    parser.add_argument("--test", help="Run a single test by name")
+    parser.add_argument("--list", action="store_true",
+                        help="List available tests and exit")
+    parser.add_argument("--device",
+                        help="Device serial (default: the only device)")
+    parser.add_argument("--devices",
+                        help="Comma-separated serials for parallel runs")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Pool workers (default: one per device)")
+    parser.add_argument("--threshold", type=int, default=0,
+                        help="Allowed pixel difference (default: 0)")
+    parser.add_argument("--perceptual-threshold", type=int, default=None,
+                        metavar="K",
+                        help="Pass when the pHash Hamming distance is <= K "
+                             "(requires imagehash; default: exact compare)")
+    parser.add_argument("--stop-on-failure", action="store_true",
+                        help="Stop at the first failing test")
+    parser.add_argument("--output", default="test_output",
+                        help="Output directory (default: test_output)")
+    args = parser.parse_args()
+
+    tests = get_all_tests()
+
+    if args.list:
+        for test in tests:
+            print(f"{test.name:24} {test.description}")
+        return 0
+
+    if args.test:
+        tests = [t for t in tests if t.name == args.test]
+        if not tests:
+            print(f"ERROR: Unknown test: {args.test}")
+            return 1
+
+    if args.devices:
+        devices = [s for s in args.devices.split(",") if s]
+    elif args.device:
+        devices = [args.device]
+    else:
+        devices = None
+    workers = args.workers or (len(devices) if devices else 1)
+
+    runner = TestRunner(
+        output_dir=Path(args.output),
+        threshold=args.threshold,
+        stop_on_failure=args.stop_on_failure,
+        perceptual_threshold=args.perceptual_threshold)
+    summary = runner.run_tests(tests, devices=devices, workers=workers)
+
+    return 0 if summary.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
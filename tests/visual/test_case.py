@@ -0,0 +1,75 @@
+"""TestCase and Action definitions for the visual regression tests.
+
+A test case is a named sequence of input actions (type / key / sleep)
+plus an optional reference image to compare the resulting screen
+against. Cases are built by the functions in cases/ and executed by
+test_runner.py.
+"""
+
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+
+class Action:
+    """One input step: kind is "type", "key", "sleep" or "wait_stable"."""
+
+    def __init__(self, kind: str, value):
+        self.kind = kind
+        self.value = value
+
+    def __repr__(self):
+        return f"Action({self.kind!r}, {self.value!r})"
+
+
+class TestCase:
+    """A named action sequence with an optional reference image."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self.actions: List[Action] = []
+        self.reference_image: Optional[Path] = None
+        # Shared prologue: cases with the same setup_key reuse the
+        # device state left by the previous case's setup instead of
+        # replaying it — the runner relaunches the app and performs
+        # setup_actions only when the key changes. For this to be
+        # sound, each case's actions plus teardown_actions must return
+        # the screen to the post-setup state, so captures don't depend
+        # on which same-key cases ran before. Cases without a
+        # setup_key always start from a fresh app launch.
+        self.setup_key: Optional[str] = None
+        self.setup_actions: Sequence[Action] = ()
+        self.teardown_actions: Sequence[Action] = ()
+
+    def set_setup(self, key: str, actions: Sequence[Action]) -> None:
+        """Declare the shared prologue this case expects (see setup_key)."""
+        self.setup_key = key
+        self.setup_actions = actions
+
+    def set_teardown(self, actions: Sequence[Action]) -> None:
+        """Declare actions that restore the post-setup state after capture."""
+        self.teardown_actions = actions
+
+    def add_type(self, text: str) -> None:
+        """Type text into the terminal."""
+        self.actions.append(Action("type", text))
+
+    def add_key(self, key: str) -> None:
+        """Press a named key (see ADBController.KEY_MAP)."""
+        self.actions.append(Action("key", key))
+
+    def add_sleep(self, seconds: float) -> None:
+        """Wait a fixed interval for the terminal to settle."""
+        self.actions.append(Action("sleep", seconds))
+
+    def add_wait_stable(self, timeout: float = 2.0) -> None:
+        """Wait until the screen stops changing (or timeout).
+
+        Event-driven alternative to add_sleep: the runner polls cheap
+        frame hashes and proceeds as soon as two consecutive frames
+        match, so the wait costs render time, not a fixed worst case.
+        """
+        self.actions.append(Action("wait_stable", timeout))
+
+    def __repr__(self):
+        return f"TestCase({self.name!r}, actions={len(self.actions)})"
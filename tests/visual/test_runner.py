@@ -0,0 +1,328 @@
+"""Test execution engine for the visual regression tests.
+
+Runs each TestCase on a device: launch the app, replay the case's
+input actions, capture the screen, and compare against the reference
+image. Tests are dispatched across a multiprocessing.Pool so several
+devices (or emulators) run in parallel — the workload is dominated by
+per-test sleeps and adb round-trips, so wall time scales near-linearly
+with device count.
+"""
+
+import atexit
+import json
+import multiprocessing
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from .adb_controller import ADBController
+from .image_compare import compare_images
+from .test_case import TestCase
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+
+class TestResult:
+    """Outcome of one test: pass / fail / error plus timing and diff."""
+
+    def __init__(self, name: str, status: str, duration: float,
+                 pixel_diff: int = 0, message: str = ""):
+        self.name = name
+        self.status = status
+        self.duration = duration
+        self.pixel_diff = pixel_diff
+        self.message = message
+
+    def __repr__(self):
+        return f"TestResult({self.name!r}, {self.status!r})"
+
+
+class TestRunSummary:
+    """Aggregated counters for a run — all that stays in memory.
+
+    Individual TestResults are serialized to results.jsonl as they
+    arrive and dropped, so a run's footprint is O(1) in suite size;
+    failure details live in the jsonl file.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = 0
+        self.duration = 0.0
+
+    def count(self, result: TestResult) -> None:
+        self.total += 1
+        if result.status == "pass":
+            self.passed += 1
+        elif result.status == "fail":
+            self.failed += 1
+        else:
+            self.errors += 1
+
+    @property
+    def ok(self) -> bool:
+        return self.failed == 0 and self.errors == 0
+
+
+# Process-global worker state, set up once per pool worker by
+# _init_worker: the device controller (bound to the serial this worker
+# popped from the shared queue), output dirs and the pixel threshold.
+# App launch happens here so each worker pays it once, not per test.
+_controller: Optional[ADBController] = None
+_output_dir: Optional[Path] = None
+_threshold: int = 0
+_perceptual_threshold: Optional[int] = None
+_png_compress_level: int = 1
+# setup_key of the most recent case's prologue; same-key successors
+# skip the relaunch + setup (the device is already in that state, and
+# teardowns restore it after each capture).
+_last_setup: Optional[str] = None
+
+
+def _init_worker(device_queue, output_dir: str, threshold: int,
+                 perceptual_threshold: Optional[int],
+                 png_compress_level: int) -> None:
+    global _controller, _output_dir, _threshold, _perceptual_threshold, \
+        _png_compress_level
+    serial = device_queue.get()
+    _controller = ADBController(serial)
+    _output_dir = Path(output_dir)
+    _threshold = threshold
+    _perceptual_threshold = perceptual_threshold
+    _png_compress_level = png_compress_level
+    # The controller keeps a persistent adb shell; close it when this
+    # worker process exits normally.
+    atexit.register(_controller.close)
+    _controller.launch_app()
+    _controller.wait_for_app()
+
+
+def _frame_hash(data: bytes):
+    """Cheap 8x8 average hash of a PNG frame, as a 64-bit int.
+
+    Coarse on purpose: blinking cursors and sub-pixel noise shouldn't
+    keep the screen counting as "still changing". Falls back to None
+    (caller sleeps instead) when the frame can't be decoded.
+    """
+    if not HAS_PIL:
+        return None
+    import io
+    try:
+        img = Image.open(io.BytesIO(data)).convert("L").resize((8, 8))
+    except Exception:
+        return None
+    pixels = list(img.getdata())
+    mean = sum(pixels) / 64
+    bits = 0
+    for px in pixels:
+        bits = (bits << 1) | (px > mean)
+    # Fold the mean level in so two flat screens of different
+    # brightness (e.g. clear vs fully lit) don't hash identically.
+    return (bits << 8) | int(mean)
+
+
+def _wait_stable(timeout: float, poll: float = 0.05) -> None:
+    """Wait until two consecutive frame hashes match, or timeout.
+
+    Event-driven replacement for fixed settle sleeps: the wait costs
+    however long the device takes to finish rendering, not a
+    worst-case constant per action.
+    """
+    deadline = time.time() + timeout
+    last = None
+    while time.time() < deadline:
+        data = _controller.capture_screenshot_bytes()
+        h = _frame_hash(data) if data else None
+        if h is None:
+            # Capture or decode failed; fall back to the fixed wait.
+            time.sleep(max(0.0, deadline - time.time()))
+            return
+        if last is not None and h == last:
+            return
+        last = h
+        time.sleep(poll)
+
+
+def _perform_actions(actions) -> None:
+    """Dispatch a run of actions with as few device round-trips as
+    possible: contiguous type/key/sleep actions go to the device as
+    one batched shell command; wait_stable polls host-side and so
+    flushes the pending batch first."""
+    batch = []
+    for action in actions:
+        if action.kind == "wait_stable":
+            if batch:
+                _controller.execute_actions_batch(batch)
+                batch = []
+            _wait_stable(action.value)
+        else:
+            batch.append(action)
+    if batch:
+        _controller.execute_actions_batch(batch)
+
+
+def _run_one_test(test: TestCase) -> TestResult:
+    """Execute one test in a pool worker. Never raises: errors become
+    TestResults so imap_unordered keeps streaming."""
+    global _last_setup
+    start = time.time()
+    try:
+        if test.setup_key is None or test.setup_key != _last_setup:
+            # A different (or no) prologue is on screen. Relaunch the
+            # app first so the prologue replays from a fresh shell —
+            # whatever the previous case left on screen — then run the
+            # setup. Keyless cases get a fresh launch every time.
+            _last_setup = None
+            _controller.launch_app()
+            _controller.wait_for_app()
+            _perform_actions(test.setup_actions)
+            _last_setup = test.setup_key
+        _perform_actions(test.actions)
+
+        actual = _output_dir / "screenshots" / f"{test.name}.actual.png"
+        if not _controller.capture_screenshot(
+                actual, compress_level=_png_compress_level):
+            _last_setup = None
+            return TestResult(test.name, "error", time.time() - start,
+                              message="screenshot capture failed")
+
+        # Restore the post-setup state before the host-side compare so
+        # the next same-key case starts from the screen its reference
+        # image assumes.
+        _perform_actions(test.teardown_actions)
+
+        if test.reference_image is None or not test.reference_image.exists():
+            # No reference yet: pass so the actual screenshot can be
+            # verified by hand and promoted (see tests/README.md).
+            return TestResult(test.name, "pass", time.time() - start,
+                              message="no reference image")
+
+        diff_path = _output_dir / "diffs" / f"{test.name}.diff.png"
+        pixel_diff = compare_images(
+            actual, test.reference_image, diff_path,
+            perceptual_threshold=_perceptual_threshold)
+        if pixel_diff < 0:
+            return TestResult(test.name, "error", time.time() - start,
+                              message="comparison failed")
+        status = "pass" if pixel_diff <= _threshold else "fail"
+        return TestResult(test.name, status, time.time() - start,
+                          pixel_diff=pixel_diff)
+    except Exception as e:
+        # Unknown device state: force a full relaunch + setup for the
+        # next case.
+        _last_setup = None
+        return TestResult(test.name, "error", time.time() - start,
+                          message=str(e))
+
+
+class TestRunner:
+    """Run a list of test cases and report results."""
+
+    def __init__(self, output_dir: Path = Path("test_output"),
+                 threshold: int = 0, stop_on_failure: bool = False,
+                 perceptual_threshold: Optional[int] = None,
+                 png_compress_level: int = 1):
+        self.output_dir = Path(output_dir)
+        self.threshold = threshold
+        self.stop_on_failure = stop_on_failure
+        self.perceptual_threshold = perceptual_threshold
+        # Actual screenshots are intermediates the compare step only
+        # needs re-readable; level 1 trades a slightly larger file for
+        # a much cheaper encode.
+        self.png_compress_level = png_compress_level
+        (self.output_dir / "screenshots").mkdir(parents=True, exist_ok=True)
+        (self.output_dir / "diffs").mkdir(parents=True, exist_ok=True)
+
+    def run_tests(self, tests: List[TestCase],
+                  devices: Optional[List[str]] = None,
+                  workers: int = 1) -> TestRunSummary:
+        """Dispatch tests across a pool of device-bound workers.
+
+        Each worker binds to one serial from `devices` (round-robin if
+        workers exceed devices — only sensible for emulators that
+        tolerate concurrent input) and streams results back as they
+        finish via imap_unordered. stop_on_failure terminates the pool
+        at the first non-pass, mirroring the sequential semantics.
+        Results are appended to results.jsonl as they arrive rather
+        than accumulated; only the summary counters are returned.
+        """
+        devices = devices or [None]
+        workers = max(1, min(workers, len(tests)))
+
+        print("=" * 70)
+        print(f"Running {len(tests)} visual regression tests")
+        print(f"Device: {', '.join(str(d or 'default') for d in devices)}")
+        print(f"Output: {self.output_dir}")
+        print(f"Threshold: {self.threshold} pixels")
+        print(f"Workers: {workers}")
+        print("=" * 70 + "\n")
+
+        device_queue = multiprocessing.Queue()
+        for i in range(workers):
+            device_queue.put(devices[i % len(devices)])
+
+        start = time.time()
+        summary = TestRunSummary()
+        pool = multiprocessing.Pool(
+            workers,
+            initializer=_init_worker,
+            initargs=(device_queue, str(self.output_dir), self.threshold,
+                      self.perceptual_threshold, self.png_compress_level))
+        try:
+            with open(self.output_dir / "results.jsonl", "w") as results_fp:
+                stream = pool.imap_unordered(_run_one_test, tests)
+                for result in stream:
+                    summary.count(result)
+                    results_fp.write(json.dumps({
+                        "name": result.name,
+                        "status": result.status,
+                        "duration": round(result.duration, 3),
+                        "pixel_diff": result.pixel_diff,
+                        "message": result.message,
+                    }) + "\n")
+                    self._print_result(result, summary.total, len(tests))
+                    if self.stop_on_failure and result.status != "pass":
+                        pool.terminate()
+                        break
+                else:
+                    pool.close()
+        finally:
+            pool.join()
+
+        summary.duration = time.time() - start
+        self._print_summary(summary)
+        return summary
+
+    @staticmethod
+    def _print_result(result: TestResult, done: int, total: int) -> None:
+        prefix = f"[{done}/{total}]"
+        if result.status == "pass":
+            print(f"{prefix}   {result.name} ... ✓ PASS "
+                  f"({result.duration:.2f}s)")
+        elif result.status == "fail":
+            print(f"{prefix}   {result.name} ... ✗ FAIL "
+                  f"(diff: {result.pixel_diff} pixels, "
+                  f"{result.duration:.2f}s)")
+        else:
+            print(f"{prefix}   {result.name} ... ⚠ ERROR "
+                  f"({result.message}, {result.duration:.2f}s)")
+
+    @staticmethod
+    def _print_summary(summary: TestRunSummary) -> None:
+        rate = (100.0 * summary.passed / summary.total) if summary.total else 0.0
+        print("\n" + "=" * 70)
+        print("Test Summary")
+        print("=" * 70)
+        print(f"Total:    {summary.total}")
+        print(f"Passed:   {summary.passed} ✓")
+        print(f"Failed:   {summary.failed} ✗")
+        print(f"Errors:   {summary.errors} ⚠")
+        print(f"Success:  {rate:.1f}%")
+        print(f"Duration: {summary.duration:.2f}s")
+        print("=" * 70)